@@ -41,11 +41,38 @@ environment variables that are currently used:
 | `SQL_ECHO` | not defined | Whether to echo SQL statements to the console for debugging purposes. |
 | `DISABLE_AUTH` | not defined | Whether to disable authentication. When running with authentication disabled, the user is assumed to be logged as the user with `id=1`, which must exist in the database. |
 | `ACCESS_TOKEN_MINUTES` | `15` | The number of minutes an access token is valid for. |
+| `ACCESS_TOKEN_SIGNED` | not defined | Whether to issue signed (JWT) access tokens that are validated without looking up the token in the database. The user of the token is still loaded by its primary key. Access tokens issued before this option is changed become invalid. |
+| `REVOCATION_SYNC_SECONDS` | `5` | With signed access tokens, the number of seconds between checks for tokens revoked by other workers. |
 | `REFRESH_TOKEN_DAYS` | `7` | The number of days a refresh token is valid for. |
 | `REFRESH_TOKEN_IN_COOKIE` | `yes` | Whether to return the refresh token in a secure cookie. |
 | `REFRESH_TOKEN_IN_BODY` | `no` | Whether to return the refresh token in the response body. |
+| `TOKEN_CACHE_SIZE` | `1024` | The maximum number of access tokens each worker keeps resolved in memory. |
+| `TOKEN_CACHE_SECONDS` | `60` | The number of seconds a resolved access token is trusted without checking the database. Revocations made by another worker can take up to this long to be seen. Set to `0` to disable the cache. |
+| `LAST_SEEN_RESOLUTION_SECONDS` | `60` | A user's `last_seen` time is only updated when it is older than this number of seconds. |
+| `LAST_SEEN_FLUSH_SECONDS` | `30` | The number of seconds `last_seen` updates are buffered in memory before they are written to the database in bulk. |
+| `TOKEN_CLEAN_INLINE` | `yes` | Whether to delete old tokens from the database every time a user logs in. Disable it when `flask cmd clean-tokens` is scheduled to run periodically instead. |
 | `RESET_TOKEN_MINUTES` | `15` | The number of minutes a reset token is valid for. |
+| `PASSWORD_HASH_METHOD` | `pbkdf2:sha256:260000` | The werkzeug password hashing method, including its parameters. Passwords hashed with different parameters are rehashed when the user logs in. |
+| `PASSWORD_HASH_WORKERS` | `2` | The number of threads each worker uses to check passwords. |
+| `PASSWORD_HASH_QUEUE` | `16` | The number of password checks that can wait for a free thread. Logins beyond this limit fail with a `503` status code. |
+| `PASSWORD_HASH_TIMEOUT` | `10` | The number of seconds a login waits for its password check before failing with a `503` status code. |
 | `PASSWORD_RESET_URL` | `http://localhost:3000/reset` | The URL that will be used in password reset links. |
+| `COUNT_CACHE_SIZE` | `1024` | The maximum number of collection totals each worker keeps in memory for paginated requests that use the `cached` or `estimated` total modes. |
+| `COUNT_CACHE_SECONDS` | `30` | The number of seconds a cached collection total is reused. |
+| `ETAG_CACHE_SIZE` | `4096` | The maximum number of ETags of single resources each worker keeps in memory. |
+| `ETAG_CACHE_SECONDS` | `10` | The number of seconds a remembered ETag is trusted without checking the database. Changes made by another worker can take up to this long to be seen by clients that send `If-None-Match`. Set to `0` to disable the cache. |
+| `EXPIRY_INTERVAL_SECONDS` | `60` | The number of seconds between checks for published missions that have expired, which are then moved to the `expired` status. Set to `0` to disable the check in the web workers, and run `flask cmd expire-missions` periodically instead. |
+| `EXPIRY_LOOKAHEAD_SECONDS` | `3600` | Each worker loads the expirations of the next this many seconds from the database into memory at a time. |
+| `EXPIRY_BATCH_SIZE` | `500` | The number of missions expired per transaction. |
+| `AUDIT_QUEUE_INTERVAL_MS` | `0` | When set, change log entries are not written in the transaction of the request. They are queued in memory when the transaction commits, and a background thread of each worker writes them in batches every this many milliseconds. The default of `0` writes them in the request's transaction, as CLI commands always do. |
+| `AUDIT_QUEUE_BATCH_SIZE` | `500` | The number of queued change log entries that triggers a write before the interval ends. |
+| `AUDIT_SPOOL_PATH` | `audit-spool.jsonl` | The file where queued change log entries are saved when they cannot be written, or when a worker exits before writing them. The file is replayed when a worker starts, or with `flask cmd replay-audit-spool`. |
+| `CHANGE_LOG_RETENTION_DAYS` | `90` | The number of days change log entries are kept in the database by `flask cmd archive-changes`. Older entries are moved to the archive. |
+| `CHANGE_LOG_ARCHIVE_DIR` | `archive` | The directory of the change log archive. It holds a gzip compressed JSON lines file per day, which can be searched with `flask cmd read-archive`. |
+| `COMPRESS_MIN_SIZE` | `500` | JSON responses of at least this many bytes are compressed when the client accepts it, with `gzip`, or with `br` when the `brotli` package is installed. |
+| `COMPRESS_LEVEL` | `6` | The compression level. Set to `0` to disable compression. |
+| `COMPRESS_CACHE_SIZE` | `256` | The maximum number of compressed response bodies each worker keeps in memory. Only responses with an ETag are cached. |
+| `COMPRESS_CACHE_SECONDS` | `60` | The number of seconds a compressed response body is kept. |
 | `USE_CORS` | `yes` | Whether to allow cross-origin requests. If allowed, CORS support can be configured or customized with options provided by the Flask-CORS extension. |
 | `DOCS_UI` | `elements` | The UI library to use for the documentation. Allowed values are `swagger_ui`, `redoc`, `rapidoc` and `elements`. |
 | `MAIL_SERVER` | `localhost` | The mail server to use for sending emails. |
@@ -138,6 +165,36 @@ attribute is also included with `offset`, `limit`, `count` and `total`
 sub-attributes, which should enable the client to present pagination controls
 to the user.
 
+For sorted collections the `pagination` attribute also includes a `next`
+cursor, which is `null` on the last page. Passing it back in the `cursor`
+argument returns the following page. Unlike `after`, a cursor identifies a
+single item even when several items share the same sort key, and deep pages
+are as fast to retrieve as the first one. When `cursor` is used the `offset`
+sub-attribute is `null`. Example:
+
+    http://localhost:5000/api/missions/galaxy/YP-J33?limit=10&cursor=WyIyMDIz...
+
+Counting the `total` can be as expensive as retrieving the page itself. The
+`total_mode` argument selects how it is computed: `exact` counts every time,
+`cached` reuses a count that may be up to `COUNT_CACHE_SECONDS` old,
+`estimated` uses the row estimate of the database query planner (PostgreSQL
+only, otherwise the same as `cached`) and `none` does not compute it at all.
+Each endpoint has its own default, usually `exact`. The `has_more`
+sub-attribute tells if there are items after the current page in all modes.
+An `offset` past an `exact` total is rejected with a `400` status code, while
+in the other modes it returns an empty page.
+
+## Conditional Requests
+
+Responses for missions, accounts and users, and for paginated collections,
+include a weak `ETag` header. A client that already has a copy of a resource
+can send its ETag back in the `If-None-Match` header, and the server responds
+with a `304` status code and no body when the resource has not changed.
+
+The ETag of a single resource changes when it or any resource nested in it is
+updated. Activity updates to the `last_seen` attribute of users do not change
+it. The ETag of a paginated collection is computed from the response body.
+
 ## Errors
 
 All errors returned by this API use the following JSON structure:
@@ -8,8 +8,10 @@ from flask import Blueprint
 
 from api import db
 from api.auth import token_auth
+from api.decorators import conditional_response
 from api.decorators import paginated_response
 from api.enums import Action
+from api.loading import eager_load_options
 from api.models import Account
 from api.models import ChangeLog
 from api.schemas import AccountSchema
@@ -64,21 +66,20 @@ def new(args):
     # Setup
     account = Account(owner=user, **args)
     db.session.add(account)
-    db.session.commit()
+    db.session.flush()  # assigns the id, committed with the change below
 
     # Track changes
-    change = ChangeLog(
-        object_type=type(account).__name__,
-        object_id=account.id,
-        operation=Action.INSERT.value,
-        requester_id=user.id,
-        attribute_name='',
-        old_value='',
-        new_value=f'Add Account ID: {account.id}',
-    )
+    ChangeLog.write([{
+        'object_type': type(account).__name__,
+        'object_id': account.id,
+        'operation': Action.INSERT.value,
+        'requester_id': user.id,
+        'attribute_name': '',
+        'old_value': '',
+        'new_value': f'Add Account ID: {account.id}',
+    }])
 
     # Save data
-    db.session.add(change)
     db.session.commit()
     return account
 
@@ -90,13 +91,16 @@ def new(args):
     401: 'User cannot access account info from others',
     404: 'Account not found',
 })
+@conditional_response(account_schema)
 def get(id):
     """Retrieve a account by id
     **Note**: User can only view the account owned by himself.
     """
 
     user = token_auth.current_user()
-    account = db.session.get(Account, id) or abort(404)
+    account = db.session.get(
+        Account, id, options=eager_load_options(account_schema),
+    ) or abort(404)
 
     if account.owner_id != user.id:
         abort(401)
@@ -146,31 +150,14 @@ def put(data, id):
 
     # Setup
     account = db.session.get(Account, id) or abort(404)
-    prev = {key: getattr(account, key) for key in dict(data).keys()}
 
     # Gatekeeper
     if account.owner_id != user.id:
         abort(401)
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     account.update(data)
 
-    # Track changes
-    for key in prev.keys():
-        if getattr(account, key) == prev[key]:
-            # No need to log if the change is same as the origional value.
-            continue
-        change = ChangeLog(
-            object_type=type(account).__name__,
-            object_id=account.id,
-            operation=Action.UPDATE.value,
-            requester_id=user.id,
-            attribute_name=key,
-            old_value=prev[key],
-            new_value=getattr(account, key),
-        )
-        db.session.add(change)
-
     # Save data
     db.session.commit()
     return account
@@ -195,26 +182,14 @@ def setdefault(id):
 
     # Setup
     account = db.session.get(Account, id) or abort(404)
-    prev = user.default_account_id or ''
 
     # Gatekeeper
     if account.owner_id != user.id:
         abort(401)
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     user.default_account_id = account.id
 
-    # Track changes
-    change = ChangeLog(
-        object_type=type(account).__name__,
-        object_id=account.id,
-        operation=Action.UPDATE.value,
-        requester_id=user.id,
-        attribute_name='default_account_id',
-        old_value=prev,
-        new_value=account.id,
-    )
-    db.session.add(change)
     # Save data
     db.session.commit()
 
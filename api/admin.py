@@ -1,3 +1,4 @@
+from apifairy import arguments
 from apifairy import authenticate
 from apifairy import body
 from apifairy import response
@@ -7,13 +8,18 @@ from flask import Blueprint
 
 from api import db
 from api.auth import token_auth
+from api.decorators import conditional_response
 from api.decorators import paginated_response
-from api.enums import Action
 from api.enums import Role
+from api.enums import TotalMode
+from api.loading import eager_load_options
 from api.models import Account
 from api.models import ChangeLog
 from api.models import User
 from api.schemas import AccountSchema
+from api.schemas import ChangeLogSchema
+from api.schemas import ChangeLogWindowSchema
+from api.schemas import DateTimePaginationSchema
 from api.schemas import EmptySchema
 from api.schemas import UpdateUserRoleSchema
 from api.schemas import UpdateUserSchema
@@ -26,11 +32,13 @@ account_schema = AccountSchema()
 accounts_schema = AccountSchema(many=True)
 update_user_schema = UpdateUserSchema(partial=True)
 update_user_role = UpdateUserRoleSchema()
+changes_schema = ChangeLogSchema(many=True)
+change_window_schema = ChangeLogWindowSchema()
 
 
 @admin.route('/users', methods=['GET'])
 @authenticate(token_auth, role=[Role.ADMIN.value])
-@paginated_response(users_schema)
+@paginated_response(users_schema, total_mode=TotalMode.CACHED.value)
 def all_user():
     """Retrieve all users"""
     return User.select()
@@ -54,33 +62,17 @@ def all_account():
 def activate_account(id):
     """Activate the account"""
 
-    # Issuer
-    requester = token_auth.current_user()
-
     # Setup
     account = db.session.get(Account, id) or abort(404)
-    prev = account.activated
 
     # Gatekeeper
     if account.is_activated():
         abort(409)
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     account.activate()
 
-    # Track changes
-    change = ChangeLog(
-        object_type=type(account).__name__,
-        object_id=account.id,
-        operation=Action.UPDATE.value,
-        requester_id=requester.id,
-        attribute_name='activated',
-        old_value=prev,
-        new_value=account.activated,
-    )
-
     # Save data
-    db.session.add(change)
     db.session.commit()
 
 
@@ -97,33 +89,17 @@ def activate_account(id):
 def deactivate_account(id):
     """Deactivate the account"""
 
-    # Issuer
-    requester = token_auth.current_user()
-
     # Setup
     account = db.session.get(Account, id) or abort(404)
-    prev = account.activated
 
     # Gatekeeper
     if not account.is_activated():
         abort(409)
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     account.deactivate()
 
-    # Track changes
-    change = ChangeLog(
-        object_type=type(account).__name__,
-        object_id=account.id,
-        operation=Action.UPDATE.value,
-        requester_id=requester.id,
-        attribute_name='activated',
-        old_value=prev,
-        new_value=account.activated,
-    )
-
     # Save data
-    db.session.add(change)
     db.session.commit()
 
 
@@ -142,12 +118,8 @@ def deactivate_account(id):
 def setRole(data, id):
     """Set a specific role for the user"""
 
-    # Issuer
-    requester = token_auth.current_user()
-
     # Setup
     user = db.session.get(User, id) or abort(404)
-    prev = user.role
 
     # Gatekeeper
     if not Role.isValid(data['role']):
@@ -155,22 +127,10 @@ def setRole(data, id):
     if user.role == data['role']:
         abort(409)
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     user.role = data['role']
 
-    # Track changes
-    change = ChangeLog(
-        object_type=type(user).__name__,
-        object_id=user.id,
-        operation=Action.UPDATE.value,
-        requester_id=requester.id,
-        attribute_name='activated',
-        old_value=prev,
-        new_value=user.role,
-    )
-
     # Save data
-    db.session.add(change)
     db.session.commit()
 
 
@@ -187,35 +147,11 @@ def modifyUserInfo(data, id):
     Please use seperate API to set role, activate or deactivate user.
     """
 
-    # Issuer
-    requester = token_auth.current_user()
-
     # Setup
     user = db.session.get(User, id) or abort(404)
-    prev = {
-        key: getattr(user, key)
-        for key in dict(data).keys()
-        if key != 'password'
-    }
-    if 'password' in data:
-        prev['password_hash'] = user.password_hash
-
-    # Modification
-    user.update(data)
 
-    # Track changes
-    for key in prev.keys():
-        if getattr(user, key) is not None:
-            change = ChangeLog(
-                object_type=type(user).__name__,
-                object_id=user.id,
-                operation=Action.UPDATE.value,
-                requester_id=requester.id,
-                attribute_name=key,
-                old_value=prev[key],
-                new_value=getattr(user, key),
-            )
-            db.session.add(change)
+    # Modification, changes are tracked by `api.audit`
+    user.update(data)
 
     # Save data
     db.session.commit()
@@ -235,33 +171,12 @@ def modifyAccountInfo(data, id):
     Please use seperate API to set role, activate or deactivate user.
     """
 
-    # Issuer
-    requester = token_auth.current_user()
-
     # Setup
     account = db.session.get(Account, id) or abort(404)
-    prev = {
-        key: getattr(Account, key)
-        for key in dict(data).keys()
-    }
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     account.update(data)
 
-    # Track changes
-    for key in dict(data).keys():
-        if getattr(account, key) is not None:
-            change = ChangeLog(
-                object_type=type(account).__name__,
-                object_id=account.id,
-                operation=Action.UPDATE.value,
-                requester_id=requester.id,
-                attribute_name=key,
-                old_value=prev[key],
-                new_value=getattr(account, key),
-            )
-            db.session.add(change)
-
     # Save data
     db.session.commit()
     return account
@@ -271,12 +186,15 @@ def modifyAccountInfo(data, id):
 @authenticate(token_auth, role=[Role.ADMIN.value])
 @response(account_schema)
 @other_responses({404: 'Account not found'})
+@conditional_response(account_schema)
 def get(id):
     """Retrieve a account by id
     Admin access is not limited by ownership.
     """
 
-    return db.session.get(Account, id) or abort(404)
+    return db.session.get(
+        Account, id, options=eager_load_options(account_schema),
+    ) or abort(404)
 
 
 @admin.route('/accounts/<account_name>', methods=['GET'])
@@ -298,3 +216,69 @@ def get_by_username(account_name):
         abort(401)
 
     return account
+
+
+def changes_in_window(query, window):
+    if window.get('since') is not None:
+        query = query.where(ChangeLog.timestamp >= window['since'])
+    if window.get('until') is not None:
+        query = query.where(ChangeLog.timestamp < window['until'])
+    return query
+
+
+@admin.route('/changes', methods=['GET'])
+@authenticate(token_auth, role=[Role.ADMIN.value])
+@paginated_response(
+    changes_schema, order_by=ChangeLog.timestamp, order_direction='desc',
+    pagination_schema=DateTimePaginationSchema,
+    total_mode=TotalMode.NONE.value,
+)
+@arguments(change_window_schema)
+def all_changes(window):
+    """Retrieve the change log
+    Entries are returned newest first. Use the `next` cursor of a page to
+    get the following one.
+    """
+    return changes_in_window(ChangeLog.select(), window)
+
+
+@admin.route('/changes/<object_type>/<int:object_id>', methods=['GET'])
+@authenticate(token_auth, role=[Role.ADMIN.value])
+@paginated_response(
+    changes_schema, order_by=ChangeLog.timestamp, order_direction='desc',
+    pagination_schema=DateTimePaginationSchema,
+    total_mode=TotalMode.NONE.value,
+)
+@arguments(change_window_schema)
+@other_responses({404: 'Unknown object type'})
+def object_changes(window, object_type, object_id):
+    """Retrieve the history of an object
+    The object type is one of `User`, `Account` or `Mission`. Entries are
+    returned newest first.
+    """
+    if object_type not in ['User', 'Account', 'Mission']:
+        abort(404)
+    return changes_in_window(
+        ChangeLog.select().filter_by(
+            object_type=object_type, object_id=object_id,
+        ),
+        window,
+    )
+
+
+@admin.route('/users/<int:id>/changes', methods=['GET'])
+@authenticate(token_auth, role=[Role.ADMIN.value])
+@paginated_response(
+    changes_schema, order_by=ChangeLog.timestamp, order_direction='desc',
+    pagination_schema=DateTimePaginationSchema,
+    total_mode=TotalMode.NONE.value,
+)
+@arguments(change_window_schema)
+def requester_changes(window, id):
+    """Retrieve the changes made by a user
+    Use an id of 0 for the changes made by the system. Entries are returned
+    newest first.
+    """
+    return changes_in_window(
+        ChangeLog.select().filter_by(requester_id=id), window,
+    )
@@ -9,6 +9,13 @@ from flask_mail import Mail
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 
+from api.audit_queue import AuditQueue
+from api.cache import RevocationList
+from api.cache import TTLCache
+from api.expiry import ExpirySchedule
+from api.json_provider import ORJSONProvider
+from api.last_seen import LastSeenBuffer
+from api.passwords import PasswordHasher
 from config import Config
 # import flask_admin
 
@@ -18,14 +25,25 @@ ma: Marshmallow = Marshmallow()
 cors = CORS()
 mail = Mail()
 apifairy = APIFairy()
+token_cache = TTLCache()
+count_cache = TTLCache()
+etag_cache = TTLCache()
+compression_cache = TTLCache()
+last_seen_buffer = LastSeenBuffer()
+expiry_schedule = ExpirySchedule()
+audit_queue = AuditQueue()
+revoked_tokens = RevocationList()
+password_hasher = PasswordHasher()
 
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = ORJSONProvider(app)
 
     # extensions
     from api import models
+    from api import audit  # noqa: F401
     db.init_app(app)
     migrate.init_app(app, db)
     ma.init_app(app)
@@ -33,6 +51,37 @@ def create_app(config_class=Config):
         cors.init_app(app)
     mail.init_app(app)
     apifairy.init_app(app)
+    token_cache.configure(
+        app.config['TOKEN_CACHE_SIZE'], app.config['TOKEN_CACHE_SECONDS'],
+    )
+    count_cache.configure(
+        app.config['COUNT_CACHE_SIZE'], app.config['COUNT_CACHE_SECONDS'],
+    )
+    etag_cache.configure(
+        app.config['ETAG_CACHE_SIZE'], app.config['ETAG_CACHE_SECONDS'],
+    )
+    compression_cache.configure(
+        app.config['COMPRESS_CACHE_SIZE'],
+        app.config['COMPRESS_CACHE_SECONDS'],
+    )
+    last_seen_buffer.configure(app.config['LAST_SEEN_FLUSH_SECONDS'])
+    expiry_schedule.configure(
+        app.config['EXPIRY_INTERVAL_SECONDS'],
+        app.config['EXPIRY_LOOKAHEAD_SECONDS'],
+        app.config['EXPIRY_BATCH_SIZE'],
+    )
+    audit_queue.configure(
+        app.config['AUDIT_QUEUE_INTERVAL_MS'],
+        app.config['AUDIT_QUEUE_BATCH_SIZE'],
+        app.config['AUDIT_SPOOL_PATH'],
+    )
+    revoked_tokens.configure(app.config['REVOCATION_SYNC_SECONDS'])
+    password_hasher.configure(
+        app.config['PASSWORD_HASH_METHOD'],
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_QUEUE'],
+        app.config['PASSWORD_HASH_TIMEOUT'],
+    )
 
     # blueprints
     from api.errors import errors
@@ -69,10 +118,31 @@ def create_app(config_class=Config):
     def index():  # pragma: no cover
         return redirect(url_for('apifairy.docs'))
 
+    @app.before_request
+    def start_background_tasks():
+        # started here rather than in create_app, so that CLI commands do
+        # not run them
+        expiry_schedule.start(app, models.Mission.expire_due)
+        audit_queue.start(app, models.ChangeLog.write_queued)
+
     @app.after_request
     def after_request(response):
         # Werkzeu sometimes does not flush the request body so we do it here
         request.get_data()
         return response
 
+    from api.compression import compress_response
+
+    @app.after_request
+    def compress(response):
+        return compress_response(
+            request, response, app.config['COMPRESS_MIN_SIZE'],
+            app.config['COMPRESS_LEVEL'],
+        )
+
+    @app.teardown_request
+    def flush_last_seen(exc):
+        if last_seen_buffer.due():
+            models.User.flush_last_seen()
+
     return app
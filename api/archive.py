@@ -0,0 +1,145 @@
+import gzip
+import json
+import os
+from datetime import date
+from datetime import datetime
+
+import sqlalchemy as sqla
+
+from api.app import db
+from api.models import ChangeLog
+
+
+def archive_path(directory, day):
+    """Return the archive file of the change log entries of a day."""
+    return os.path.join(
+        directory, f'{day:%Y}', f'{day:%m}',
+        f'change_log-{day:%Y-%m-%d}.jsonl.gz',
+    )
+
+
+def write_archive(directory, rows):
+    """Append rows to the archive files of their days.
+
+    Each call adds a gzip member to the files it touches, which `gzip`
+    reads back as a single stream. The files are synced to disk before
+    returning.
+    """
+    days = {}
+    for row in rows:
+        days.setdefault(row['timestamp'].date(), []).append(row)
+    for day, day_rows in days.items():
+        path = archive_path(directory, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+                for row in day_rows:
+                    gz.write(json.dumps({
+                        **row, 'timestamp': row['timestamp'].isoformat(),
+                    }).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def archive_changes(before, directory, batch_size=500):
+    """Move the change log entries older than `before` to archive files.
+
+    Entries are moved oldest first, `batch_size` at a time, and each batch
+    is deleted in its own transaction after it is written to disk. If the
+    process stops in between, the batch is archived again by the next run,
+    and `read_archive` skips the duplicates. Returns the number of entries
+    moved.
+    """
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            sqla.select(*ChangeLog.__table__.columns).where(
+                ChangeLog.timestamp < before,
+            ).order_by(ChangeLog.timestamp, ChangeLog.id).limit(batch_size),
+        ).mappings().all()
+        if not rows:
+            break
+        write_archive(directory, [dict(row) for row in rows])
+        db.session.execute(
+            sqla.delete(ChangeLog).where(
+                ChangeLog.id.in_([row['id'] for row in rows]),
+            ),
+        )
+        db.session.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    return moved
+
+
+def compact():
+    """Return the space freed by deleted rows to the file system.
+
+    Only SQLite and PostgreSQL are supported, other databases are left
+    alone. Returns whether the database was compacted.
+    """
+    engine = db.get_engine()
+    if engine.dialect.name == 'sqlite':
+        statement = 'VACUUM'
+    elif engine.dialect.name == 'postgresql':  # pragma: no cover
+        statement = f'VACUUM ANALYZE {ChangeLog.__tablename__}'
+    else:  # pragma: no cover
+        return False
+    db.session.close()
+    # VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(
+        isolation_level='AUTOCOMMIT',
+    ) as connection:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def archive_days(directory):
+    """Return the days that have an archive file, in order."""
+    days = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.startswith('change_log-') and \
+                    name.endswith('.jsonl.gz'):
+                days.append(date.fromisoformat(name[11:21]))
+    return sorted(days)
+
+
+def read_archive(
+    directory, since=None, until=None, object_type=None, object_id=None,
+    requester_id=None,
+):
+    """Iterate over archived change log entries, oldest first.
+
+    Entries are returned as dictionaries with the columns of the
+    `ChangeLog` model, filtered by a `since` (inclusive) and `until`
+    (exclusive) time window and by object or requester. Only the files of
+    the days in the window are opened.
+    """
+    filters = {
+        'object_type': object_type,
+        'object_id': object_id,
+        'requester_id': requester_id,
+    }
+    filters = {key: value for key, value in filters.items()
+               if value is not None}
+    for day in archive_days(directory):
+        if since is not None and day < since.date():
+            continue
+        if until is not None and day > until.date():
+            break
+        rows = {}
+        with gzip.open(archive_path(directory, day), 'rt') as f:
+            for line in f:
+                row = json.loads(line)
+                row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+                if since is not None and row['timestamp'] < since:
+                    continue
+                if until is not None and row['timestamp'] >= until:
+                    continue
+                if any(row[key] != value for key, value in filters.items()):
+                    continue
+                rows[row['id']] = row
+        yield from sorted(
+            rows.values(), key=lambda row: (row['timestamp'], row['id']),
+        )
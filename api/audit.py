@@ -0,0 +1,88 @@
+import sqlalchemy as sqla
+from flask import has_request_context
+from sqlalchemy import orm as so
+
+from api.app import audit_queue
+from api.auth import token_auth
+from api.enums import Action
+from api.models import ChangeLog
+from api.models import Updateable
+
+
+def requester_id():
+    """Return the id of the user making the request, or 0 outside of one."""
+    if has_request_context():
+        user = token_auth.current_user()
+        if user is not None:
+            return user.id
+    return 0
+
+
+def object_changes(obj, requester):
+    """Return change log rows for the modified attributes of `obj`.
+
+    The old and new values come from the attribute history kept by the
+    session, so attributes set to their current value are not recorded.
+    """
+    state = sqla.inspect(obj)
+    changes = []
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        if key in obj.audit_exclude:
+            continue
+        history = state.attrs[key].history
+        if not history.added and not history.deleted:
+            continue
+        changes.append({
+            'object_type': type(obj).__name__,
+            'object_id': obj.id,
+            'operation': Action.UPDATE.value,
+            'requester_id': requester,
+            'attribute_name': key,
+            'old_value': history.deleted[0] if history.deleted else None,
+            'new_value': history.added[0] if history.added else None,
+        })
+    return changes
+
+
+def keep_old_value(target, value, oldvalue, initiator):
+    """No-op listener, registering it with ``active_history`` is enough."""
+
+
+def track_old_values(model):
+    """Load expired attributes of `model` before they are set, so that
+    their history has the old value to record."""
+    for attr in sqla.inspect(model).column_attrs:
+        if attr.key not in model.audit_exclude:
+            sqla.event.listen(
+                getattr(model, attr.key), 'set', keep_old_value,
+                active_history=True,
+            )
+
+
+for model in Updateable.__subclasses__():
+    track_old_values(model)
+
+
+@sqla.event.listens_for(so.Session, 'before_flush')
+def record_changes(session, flush_context, instances):
+    """Write change log rows for every updated model in the flush."""
+    changes = []
+    requester = None
+    for obj in session.dirty:
+        if not isinstance(obj, Updateable):
+            continue
+        if requester is None:
+            requester = requester_id()
+        changes += object_changes(obj, requester)
+    ChangeLog.write(changes, session)
+
+
+@sqla.event.listens_for(so.Session, 'after_commit')
+def queue_changes(session):
+    audit_queue.commit(session)
+
+
+@sqla.event.listens_for(so.Session, 'after_rollback')
+def discard_changes(session):
+    audit_queue.discard(session)
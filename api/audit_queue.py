@@ -0,0 +1,207 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+from collections import deque
+from datetime import datetime
+from threading import Event
+from threading import Lock
+from threading import Thread
+from uuid import uuid4
+
+
+class AuditQueue:
+    """In-process queue of change log rows written by a background thread.
+
+    When enabled, the rows of a transaction are staged on its session and
+    only queued once it commits, so that a rolled back request leaves no
+    trace. A writer thread inserts the queued rows in batches every
+    `interval` milliseconds, or as soon as `batch_size` rows are waiting.
+    Rows that cannot be written, or that are still queued when the process
+    exits, are appended to the `spool_path` file, which is replayed by the
+    writer thread when it starts. An interval of zero disables the queue,
+    and change log rows are then written in the request's transaction, as
+    they are in processes that do not run the writer thread, such as CLI
+    commands.
+    """
+
+    session_key = 'audit_rows'
+
+    def __init__(self, interval=0, batch_size=500, spool_path=None):
+        self._rows = deque()
+        self._lock = Lock()
+        self._writing = Lock()
+        self._wake = Event()
+        self._thread = None
+        self.configure(interval, batch_size, spool_path)
+
+    def configure(self, interval, batch_size, spool_path):
+        """Change the queue settings. Queued rows are discarded."""
+        with self._lock:
+            self.interval = interval
+            self.batch_size = batch_size
+            self.spool_path = spool_path
+            self._rows.clear()
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    @property
+    def running(self):
+        """Whether the writer thread runs in this process."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stage(self, session, rows):
+        """Hold rows until the transaction of `session` ends."""
+        session.info.setdefault(self.session_key, []).extend(rows)
+
+    def commit(self, session):
+        """Queue the rows staged on a committed session."""
+        rows = session.info.pop(self.session_key, None)
+        if rows:
+            self.put(rows)
+
+    def discard(self, session):
+        """Drop the rows staged on a rolled back session."""
+        session.info.pop(self.session_key, None)
+
+    def put(self, rows):
+        with self._lock:
+            self._rows.extend(rows)
+            if len(self._rows) >= self.batch_size:
+                self._wake.set()
+
+    def drain(self):
+        with self._lock:
+            rows, self._rows = list(self._rows), deque()
+        return rows
+
+    def flush(self, write):
+        """Pass the queued rows to `write`, spooling them if it fails."""
+        with self._writing:
+            rows = self.drain()
+            if not rows:
+                return 0
+            try:
+                write(rows)
+            except Exception:
+                self.spool(rows)
+                raise
+        return len(rows)
+
+    def spool(self, rows):
+        """Append rows to the spool file as JSON lines."""
+        if not rows or not self.spool_path:
+            return
+        while True:
+            with open(self.spool_path, 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                if not self._is_current(f):
+                    # claimed by a replay after it was opened
+                    continue
+                for row in rows:
+                    f.write(json.dumps({
+                        **row, 'timestamp': row['timestamp'].isoformat(),
+                    }) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+                return
+
+    def _is_current(self, f):
+        try:
+            return os.stat(self.spool_path).st_ino == \
+                os.fstat(f.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def replay(self, write):
+        """Pass the rows of the spool file to `write`.
+
+        The file is first renamed to a name unique to this call, so that
+        rows spooled in the meantime go to a new file and workers starting
+        together do not replay the same rows. Files left by workers that
+        stopped during a replay, or whose `write` failed, are replayed too.
+        Each file is locked while it is replayed, and files locked by
+        another worker are skipped.
+        """
+        if not self.spool_path:
+            return 0
+        claimed = f'{self.spool_path}.{os.getpid()}-{uuid4().hex}.replay'
+        try:
+            os.replace(self.spool_path, claimed)
+        except FileNotFoundError:
+            pass
+        replayed = 0
+        for path in sorted(
+            glob.glob(glob.escape(self.spool_path) + '.*.replay'),
+        ):
+            replayed += self._replay_file(path, write, wait=path == claimed)
+        return replayed
+
+    def _replay_file(self, path, write, wait):
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            return 0  # replayed by another worker
+        with f:
+            try:
+                fcntl.flock(
+                    f, fcntl.LOCK_EX if wait else
+                    fcntl.LOCK_EX | fcntl.LOCK_NB,
+                )
+            except BlockingIOError:
+                return 0  # being replayed by another worker
+            if os.fstat(f.fileno()).st_nlink == 0:
+                return 0  # replayed by another worker since it was opened
+            rows = [json.loads(line) for line in f if line.strip()]
+            for row in rows:
+                row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+            if rows:
+                write(rows)
+            os.remove(path)
+        return len(rows)
+
+    def close(self, timeout=5):
+        """Spool the queued rows, after any write in progress ends."""
+        acquired = self._writing.acquire(timeout=timeout)
+        try:
+            self.spool(self.drain())
+        finally:
+            if acquired:
+                self._writing.release()
+
+    def start(self, app, write):
+        """Write queued rows with `write` from a background thread.
+
+        The thread is started once per process, and only when the queue
+        is enabled.
+        """
+        with self._lock:
+            if self._thread is not None or not self.enabled:
+                return
+            self._thread = Thread(
+                target=self._run, args=(app, write), daemon=True,
+                name='audit-writer',
+            )
+        atexit.register(self.close)
+        self._thread.start()
+
+    def _run(self, app, write):  # pragma: no cover
+        with app.app_context():
+            try:
+                self.replay(write)
+            except Exception:
+                app.logger.exception('Could not replay the audit spool')
+        while True:
+            self._wake.wait(self.interval / 1000 or None)
+            self._wake.clear()
+            with app.app_context():
+                try:
+                    self.flush(write)
+                except Exception:
+                    app.logger.exception('Could not write the audit log')
+
+    def __len__(self):
+        return len(self._rows)
@@ -1,3 +1,4 @@
+import sqlalchemy as sa
 from flask import current_app
 from flask_httpauth import HTTPBasicAuth
 from flask_httpauth import HTTPTokenAuth
@@ -5,6 +6,7 @@ from werkzeug.exceptions import Forbidden
 from werkzeug.exceptions import Unauthorized
 
 from api.app import db
+from api.app import password_hasher
 from api.models import User
 
 basic_auth = HTTPBasicAuth()
@@ -14,10 +16,15 @@ token_auth = HTTPTokenAuth()
 @basic_auth.verify_password
 def verify_password(username, password):
     if username and password:
-        user = db.session.scalar(User.select().filter_by(username=username))
-        if user is None:
-            user = db.session.scalar(User.select().filter_by(email=username))
+        # a username match takes precedence over an email match
+        user = db.session.scalar(
+            User.select().where(
+                sa.or_(User.username == username, User.email == username),
+            ).order_by(User.username != username).limit(1),
+        )
         if user and user.verify_password(password):
+            if password_hasher.needs_rehash(user.password_hash):
+                user.password = password
             return user
 
 
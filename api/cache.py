@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache with a per-entry time to live.
+
+    The cache holds at most ``maxsize`` entries, evicting the least recently
+    used one when full. Entries older than ``ttl`` seconds are treated as
+    missing. A ``ttl`` of zero disables the cache entirely.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.configure(maxsize, ttl)
+
+    def configure(self, maxsize, ttl):
+        """Change the cache limits. Existing entries are discarded."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._data.clear()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        if not self.enabled:
+            return
+        expires = monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def discard_if(self, predicate):
+        """Remove every entry for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            keys = [
+                key for key, (_, value) in self._data.items()
+                if predicate(key, value)
+            ]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RevocationList:
+    """Process-local mirror of a table of revoked token keys.
+
+    Each entry maps a token key to the time the revocation takes effect and
+    the time the token would have expired anyway, after which the entry is
+    dropped. The owner of the list is responsible for loading the rows of
+    the table that have not expired whenever `needs_sync` returns true, and
+    for reporting the completed load through `synced`.
+    """
+
+    def __init__(self, sync_interval=5):
+        self._entries = {}
+        self._lock = Lock()
+        self.configure(sync_interval)
+
+    def configure(self, sync_interval):
+        """Change the sync interval. Existing entries are discarded."""
+        with self._lock:
+            self.sync_interval = sync_interval
+            self._entries.clear()
+            self._synced_at = None
+
+    def add(self, key, revoked, expiration):
+        with self._lock:
+            self._entries[key] = (revoked, expiration)
+
+    session_key = 'revoked_tokens'
+
+    def stage(self, session, key, revoked, expiration):
+        """Hold an entry until the transaction of `session` commits."""
+        session.info.setdefault(self.session_key, []).append(
+            (key, revoked, expiration),
+        )
+
+    def commit(self, session):
+        """Add the entries staged on a committed session."""
+        for entry in session.info.pop(self.session_key, []):
+            self.add(*entry)
+
+    def discard(self, session):
+        """Drop the entries staged on a rolled back session."""
+        session.info.pop(self.session_key, None)
+
+    def get(self, key):
+        """Return the time at which `key` is revoked, or `None`."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def needs_sync(self):
+        return self._synced_at is None or \
+            monotonic() - self._synced_at >= self.sync_interval
+
+    def synced(self, now):
+        """Record a completed sync and drop entries expired before `now`."""
+        with self._lock:
+            self._synced_at = monotonic()
+            for key in [
+                key for key, (_, expiration) in self._entries.items()
+                if expiration <= now
+            ]:
+                del self._entries[key]
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
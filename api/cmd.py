@@ -1,10 +1,28 @@
 # import random
-# import click
+import json
+from datetime import datetime
+from datetime import timedelta
+from timeit import timeit
+
+import click
 from flask import Blueprint
+from flask import current_app
 
+from api.app import audit_queue
 from api.app import db
+from api.archive import archive_changes
+from api.archive import compact
+from api.archive import read_archive
 from api.enums import Role
+from api.enums import Status
+from api.models import Account
+from api.models import ChangeLog
+from api.models import Mission
+from api.models import MissionStatusCount
+from api.models import Token
 from api.models import User
+from api.schemas import MissionSchema
+from api.serializers import compile_serializer
 # from faker import Faker
 
 cmd = Blueprint('cmd', __name__)
@@ -39,3 +57,149 @@ def dropall():
     """Reset database and drop all data."""
     db.session.close()
     db.drop_all()
+
+
+@cmd.cli.command('clean-tokens')
+@click.option(
+    '--batch-size', default=500, show_default=True,
+    help='Number of tokens deleted per transaction.',
+)
+def clean_tokens(batch_size):
+    """Delete tokens that have been expired for more than a day.
+
+    Meant to run periodically, for example from cron, when the
+    TOKEN_CLEAN_INLINE option is disabled.
+    """
+    deleted = Token.clean(batch_size=batch_size)
+    db.session.commit()
+    print(f'{deleted} expired tokens removed.')
+
+
+@cmd.cli.command('rebuild-mission-counts')
+def rebuild_mission_counts():
+    """Recompute the mission status counters from the mission table."""
+    counts = MissionStatusCount.rebuild()
+    db.session.commit()
+    for status, count in counts.items():
+        print(f'{status}: {count}')
+
+
+@cmd.cli.command('expire-missions')
+def expire_missions():
+    """Move published missions past their expiry time to expired.
+
+    Meant to run periodically, for example from cron, when the
+    EXPIRY_INTERVAL_SECONDS option is set to 0.
+    """
+    expired = Mission.expire_due()
+    print(f'{len(expired)} missions expired.')
+
+
+@cmd.cli.command('replay-audit-spool')
+def replay_audit_spool():
+    """Write the change log entries saved in the AUDIT_SPOOL_PATH file."""
+    replayed = audit_queue.replay(ChangeLog.write_queued)
+    print(f'{replayed} change log entries written.')
+
+
+@cmd.cli.command('archive-changes')
+@click.option(
+    '--days', type=int,
+    help='Keep this many days of entries. Defaults to the '
+    'CHANGE_LOG_RETENTION_DAYS option.',
+)
+@click.option(
+    '--batch-size', default=500, show_default=True,
+    help='Number of entries moved per transaction.',
+)
+@click.option(
+    '--compact/--no-compact', 'compact_db', default=False,
+    show_default=True,
+    help='Compact the database after moving the entries.',
+)
+def archive_change_log(days, batch_size, compact_db):
+    """Move old change log entries to the archive.
+
+    Meant to run periodically, for example from cron. The entries are
+    written to the CHANGE_LOG_ARCHIVE_DIR directory before they are
+    deleted from the database.
+    """
+    if days is None:
+        days = current_app.config['CHANGE_LOG_RETENTION_DAYS']
+    moved = archive_changes(
+        datetime.utcnow() - timedelta(days=days),
+        current_app.config['CHANGE_LOG_ARCHIVE_DIR'], batch_size=batch_size,
+    )
+    print(f'{moved} change log entries archived.')
+    if compact_db and moved and compact():
+        print('Database compacted.')
+
+
+@cmd.cli.command('read-archive')
+@click.option('--since', type=click.DateTime(), help='UTC start time.')
+@click.option('--until', type=click.DateTime(), help='UTC end time.')
+@click.option('--object-type', help='User, Account or Mission.')
+@click.option('--object-id', type=int)
+@click.option('--requester-id', type=int)
+def read_change_log_archive(
+    since, until, object_type, object_id, requester_id,
+):
+    """Print archived change log entries as JSON lines."""
+    for row in read_archive(
+        current_app.config['CHANGE_LOG_ARCHIVE_DIR'], since=since,
+        until=until, object_type=object_type, object_id=object_id,
+        requester_id=requester_id,
+    ):
+        print(json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}))
+
+
+@cmd.cli.command('benchmark-serializers')
+@click.option(
+    '--count', default=100, show_default=True,
+    help='Number of missions serialized per round.',
+)
+@click.option(
+    '--rounds', default=20, show_default=True,
+    help='Number of times the missions are serialized.',
+)
+def benchmark_serializers(count, rounds):  # pragma: no cover
+    """Compare the compiled mission serializer with marshmallow.
+
+    The missions are built in memory and nothing is written to the
+    database. Prints the average time per mission of each serializer.
+    """
+    now = datetime.utcnow()
+    owner = User(
+        id=1, username='publisher', email='publisher@example.com',
+        im_number='10000', password_hash='', role=Role.MISSION_PUBLISHER.value,
+        birthday=now, last_seen=now, version=1,
+    )
+    runner = User(
+        id=2, username='runner', email='runner@example.com',
+        im_number='10001', password_hash='',
+        role=Role.MISSION_RUNNER.value, birthday=now, last_seen=now,
+        version=1,
+    )
+    account = Account(
+        id=1, name='publisher', lp_point=100, owner=owner, esi_id=1,
+        activated=True, created=now, version=1,
+    )
+    missions = [
+        Mission(
+            id=i, title=f'mission {i}', galaxy='YP-J33', created=now,
+            expired=now + timedelta(days=3), bounty=15000000,
+            status=Status.PUBLISHED.value, publisher=account,
+            runner=runner if i % 2 else None, version=1,
+        ) for i in range(1, count + 1)
+    ]
+    schema = MissionSchema(many=True)
+    serializer = compile_serializer(schema)
+    with current_app.test_request_context():
+        marshmallow = timeit(lambda: schema.dump(missions), number=rounds)
+        compiled = timeit(
+            lambda: [serializer(mission) for mission in missions],
+            number=rounds,
+        )
+    items = count * rounds
+    print(f'marshmallow: {marshmallow / items * 1e6:.1f}us per mission')
+    print(f'compiled: {compiled / items * 1e6:.1f}us per mission')
@@ -0,0 +1,57 @@
+import zlib
+
+from api.app import compression_cache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def gzip_compress(data, level):
+    # a gzip stream with no timestamp, so that equal bodies compress equally
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data, level):  # pragma: no cover
+    return brotli.compress(data, quality=min(level, 11))
+
+
+COMPRESSORS = {'gzip': gzip_compress}
+if brotli is not None:  # pragma: no cover
+    COMPRESSORS = {'br': brotli_compress, **COMPRESSORS}
+
+
+def compress_response(request, response, min_size, level):
+    """Compress a JSON response with the best encoding the client accepts.
+
+    Bodies shorter than `min_size` bytes are left alone. Compressed bodies
+    of responses with an ETag are kept in `compression_cache`, keyed by the
+    ETag and a checksum of the body, so that identical responses are only
+    compressed once.
+    """
+    if level <= 0 or response.mimetype != 'application/json' or \
+            response.status_code != 200 or response.direct_passthrough or \
+            response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(list(COMPRESSORS))
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    etag = response.headers.get('ETag')
+    key = None
+    if etag is not None:
+        key = (encoding, level, etag, zlib.crc32(data))
+        compressed = compression_cache.get(key)
+    if key is None or compressed is None:
+        compressed = COMPRESSORS[encoding](data, level)
+        if key is not None:
+            compression_cache.set(key, compressed)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
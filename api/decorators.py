@@ -1,19 +1,143 @@
+import json
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from datetime import datetime
 from functools import wraps
 
 import sqlalchemy as sqla
 from apifairy import arguments
 from apifairy import response
 from flask import abort
+from flask import make_response
+from flask import request
 
+from api.app import count_cache
 from api.app import db
+from api.app import etag_cache
+from api.auth import token_auth
+from api.enums import TotalMode
+from api.etags import object_etag
+from api.loading import eager_load_options
 from api.schemas import PaginatedCollection
 from api.schemas import StringPaginationSchema
 
 
+def encode_cursor(key, id):
+    """Build the opaque cursor that resumes a listing after a row."""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    return urlsafe_b64encode(
+        json.dumps([key, id], separators=(',', ':')).encode(),
+    ).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order_by):
+    """Return the `(key, id)` pair stored in a cursor, or abort with 400."""
+    try:
+        key, id = json.loads(
+            urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)),
+        )
+        if order_by.type.python_type is datetime:
+            key = datetime.fromisoformat(key)
+        if not isinstance(id, int):
+            raise ValueError()
+    except (TypeError, ValueError):
+        abort(400, 'Invalid cursor')
+    return key, id
+
+
+def count_total(select_query, total_mode):
+    """Return the number of rows of a listing, or `None`.
+
+    The `cached` mode reuses totals computed for the same SQL statement and
+    parameters for `COUNT_CACHE_SECONDS`. The `estimated` mode asks the
+    query planner of PostgreSQL for its row estimate instead of counting,
+    and behaves as `cached` on other databases.
+    """
+    if total_mode == TotalMode.NONE.value:
+        return None
+    count_query = sqla.select(
+        sqla.func.count(),
+    ).select_from(select_query.subquery())
+    if total_mode == TotalMode.EXACT.value:
+        return db.session.scalar(count_query)
+
+    compiled = select_query.compile(db.get_engine())
+    key = (
+        total_mode, compiled.string, repr(sorted(compiled.params.items())),
+    )
+    total = count_cache.get(key)
+    if total is None:
+        if total_mode == TotalMode.ESTIMATED.value and \
+                compiled.dialect.name == 'postgresql':  # pragma: no cover
+            plan = db.session.connection().exec_driver_sql(
+                f'EXPLAIN (FORMAT JSON) {compiled.string}', compiled.params,
+            ).scalar()
+            total = int(plan[0]['Plan']['Plan Rows'])
+        else:
+            total = db.session.scalar(count_query)
+        count_cache.set(key, total)
+    return total
+
+
+def not_modified(etag):
+    rv = make_response('', 304)
+    rv.set_etag(etag, weak=True)
+    return rv
+
+
+def conditional_response(schema):
+    """Add a weak ETag to the object returned by a view function.
+
+    This decorator goes below APIFairy's `response` decorator. Requests
+    with a matching `If-None-Match` header get a 304 response before the
+    object is serialized. The ETag of each object is remembered for
+    `ETAG_CACHE_SECONDS`, so that matching requests for the same URL and
+    user are answered in that time without querying the database.
+    """
+    def inner(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            user = token_auth.current_user()
+            key = (
+                request.endpoint, getattr(user, 'id', None),
+                tuple(sorted(kwargs.items())),
+            )
+            cached = etag_cache.get(key)
+            if cached is not None and \
+                    request.if_none_match.contains_weak(cached[0]):
+                abort(not_modified(cached[0]))
+
+            rv = f(*args, **kwargs)
+            etag, rows = object_etag(rv, schema)
+            etag_cache.set(key, (etag, rows))
+            if request.if_none_match.contains_weak(etag):
+                abort(not_modified(etag))
+            return rv, {'ETag': f'W/"{etag}"'}
+
+        return wrapper
+
+    return inner
+
+
+def conditional_listing(f):
+    """Add a weak ETag computed from the body of a response."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        rv = make_response(f(*args, **kwargs))
+        if rv.status_code == 200:
+            rv.add_etag(weak=True)
+            rv.make_conditional(request)
+        return rv
+
+    return wrapper
+
+
 def paginated_response(
     schema, max_limit=25, order_by=None,
     order_direction='asc',
     pagination_schema=StringPaginationSchema,
+    total_mode=TotalMode.EXACT.value,
 ):
     def inner(f):
         @wraps(f)
@@ -21,22 +145,40 @@ def paginated_response(
             args = list(args)
             pagination = args.pop(-1)
             select_query = f(*args, **kwargs)
-            if order_by is not None:
-                o = order_by.desc() if order_direction == 'desc' else order_by
-                select_query = select_query.order_by(o)
 
-            count = db.session.scalar(
-                sqla.select(
-                    sqla.func.count(),
-                ).select_from(select_query.subquery()),
-            )
+            # counted before sorting, the order does not change the total
+            mode = pagination.get('total_mode', total_mode)
+            count = count_total(select_query, mode)
+
+            if order_by is not None:
+                # the primary key breaks ties between rows with the same
+                # sort key, so that cursors point to a single row
+                entity = select_query.column_descriptions[0]['entity']
+                pk = sqla.inspect(entity).primary_key[0]
+                if order_direction == 'desc':
+                    select_query = select_query.order_by(
+                        order_by.desc(), pk.desc(),
+                    )
+                else:
+                    select_query = select_query.order_by(order_by, pk)
 
             limit = pagination.get('limit', max_limit)
             offset = pagination.get('offset')
             after = pagination.get('after')
+            cursor = pagination.get('cursor')
             if limit > max_limit:
                 limit = max_limit
-            if after is not None:
+            if cursor is not None:
+                if order_by is None or limit <= 0:  # pragma: no cover
+                    abort(400)
+                position = sqla.tuple_(*decode_cursor(cursor, order_by))
+                if order_direction != 'desc':
+                    order_condition = sqla.tuple_(order_by, pk) > position
+                else:
+                    order_condition = sqla.tuple_(order_by, pk) < position
+                query = select_query.filter(order_condition)
+                offset = None
+            elif after is not None:
                 if offset is not None or order_by is None:  # pragma: no cover
                     abort(400)
                 if order_direction != 'desc':
@@ -45,7 +187,7 @@ def paginated_response(
                 else:
                     order_condition = order_by < after
                     offset_condition = order_by >= after
-                query = select_query.limit(limit).filter(order_condition)
+                query = select_query.filter(order_condition)
                 offset = db.session.scalar(
                     sqla.select(
                         sqla.func.count(),
@@ -58,28 +200,46 @@ def paginated_response(
             else:
                 if offset is None:
                     offset = 0
-                if offset < 0 or (count > 0 and offset >= count) or limit <= 0:
+                # only an exact total bounds the offset, past other totals
+                # the page is empty and has_more is false
+                if offset < 0 or limit <= 0 or (
+                    mode == TotalMode.EXACT.value and 0 < count <= offset
+                ):
                     abort(400)
 
-                query = select_query.limit(limit).offset(offset)
+                query = select_query.offset(offset)
 
-            data = db.session.scalars(query).all()
+            # one extra row tells if there are more pages without a count
+            query = query.limit(limit + 1).options(*eager_load_options(schema))
+            data = db.session.scalars(query).unique().all()
+            has_more = len(data) > limit
+            data = data[:limit]
+            next_cursor = None
+            if order_by is not None and has_more:
+                last = data[-1]
+                next_cursor = encode_cursor(
+                    getattr(last, order_by.key), getattr(last, pk.key),
+                )
             return {
                 'data': data, 'pagination': {
                     'offset': offset,
                     'limit': limit,
                     'count': len(data),
                     'total': count,
+                    'has_more': has_more,
+                    'next': next_cursor,
                 },
             }
 
         # wrap with APIFairy's arguments and response decorators
         return arguments(pagination_schema)(
-            response(
-                PaginatedCollection(
-                    schema, pagination_schema=pagination_schema,
-                ),
-            )(paginate),
+            conditional_listing(
+                response(
+                    PaginatedCollection(
+                        schema, pagination_schema=pagination_schema,
+                    ),
+                )(paginate),
+            ),
         )
 
     return inner
@@ -24,6 +24,7 @@ class Status(Enum):
     ARCHIVED = 'archived'
     DONE = 'done'
     ISSUE = 'issue'
+    EXPIRED = 'expired'
 
     @staticmethod
     def isValid(value: str):
@@ -46,7 +47,10 @@ class Status(Enum):
             return [Status.PAID.value]
         elif value == Status.PAID.value:
             return [Status.DONE.value]
-        elif value in [Status.DONE.value, Status.ARCHIVED.value, Status.ISSUE]:
+        elif value in [
+            Status.DONE.value, Status.ARCHIVED.value, Status.ISSUE.value,
+            Status.EXPIRED.value,
+        ]:
             return [value]  # Termial state will return itself.
         else:
             raise ValueError(f'Invalid type {value}')
@@ -57,6 +61,7 @@ class Status(Enum):
             Status.DONE.value,
             Status.ARCHIVED.value,
             Status.ISSUE.value,
+            Status.EXPIRED.value,
         ]
 
 
@@ -69,3 +74,11 @@ class Action(Enum):
     def isValid(value: str):
         allowed = [r.value for r in Action]
         return value in allowed
+
+
+class TotalMode(Enum):
+    """How paginated responses compute the total number of items."""
+    EXACT = 'exact'
+    CACHED = 'cached'
+    ESTIMATED = 'estimated'
+    NONE = 'none'
@@ -2,6 +2,8 @@ from flask import Blueprint
 from flask import current_app
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import Conflict
 from werkzeug.exceptions import HTTPException
 from werkzeug.exceptions import InternalServerError
 
@@ -28,6 +30,15 @@ def sqlalchemy_integrity_error(error):  # pragma: no cover
     }, 400
 
 
+@errors.app_errorhandler(StaleDataError)
+def stale_data_error(error):
+    return {
+        'code': Conflict.code,
+        'message': Conflict().name,
+        'description': 'The resource was modified by another request.',
+    }, Conflict.code
+
+
 @errors.app_errorhandler(SQLAlchemyError)
 def sqlalchemy_error(error):  # pragma: no cover
     if current_app.config['DEBUG'] is True:
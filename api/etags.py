@@ -0,0 +1,92 @@
+from hashlib import sha1
+
+import sqlalchemy as sqla
+from marshmallow import fields
+from sqlalchemy import orm as so
+
+from api.app import db
+from api.app import etag_cache
+
+session_key = 'stale_etags'
+
+
+def row_key(obj):
+    return (obj.__tablename__, obj.id)
+
+
+def object_etag(obj, schema):
+    """Return the ETag of `obj` dumped with `schema`, and the rows it uses.
+
+    The ETag is computed from the versions of the object and of the related
+    objects that the nested fields of the schema include, so it changes
+    whenever any of them is updated through the ORM. The rows are returned
+    as a frozenset of `(table, id)` keys.
+    """
+    versions = []
+    _collect_versions(obj, schema, versions, (type(schema),))
+    digest = sha1(
+        repr((type(schema).__name__, versions)).encode('utf-8'),
+    ).hexdigest()
+    return digest, frozenset(key for key, _ in versions)
+
+
+def _collect_versions(obj, schema, versions, path):
+    mapper = sqla.inspect(type(obj), raiseerr=False)
+    if mapper is None or mapper.version_id_col is None:
+        return
+    versions.append((row_key(obj), obj.version))
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, fields.Nested):
+            continue
+        relationship = mapper.relationships.get(field.attribute or name)
+        if relationship is None or \
+                relationship.lazy in ('write_only', 'dynamic'):
+            continue
+        nested = field.schema
+        if type(nested) in path:  # pragma: no cover
+            continue
+        value = getattr(obj, relationship.key)
+        for item in (value if relationship.uselist else [value]):
+            if item is not None:
+                _collect_versions(
+                    item, nested, versions, path + (type(nested),),
+                )
+
+
+def forget_etags(model, ids, session=None):
+    """Forget the ETags that depend on rows changed outside the ORM.
+
+    The ETags are forgotten when the transaction of `session` commits, so
+    that requests running in the meantime cannot cache them again from the
+    old rows.
+    """
+    session = session or db.session
+    session.info.setdefault(session_key, set()).update(
+        (model.__tablename__, id) for id in ids
+    )
+
+
+@sqla.event.listens_for(so.Session, 'after_flush')
+def stage_stale_etags(session, flush_context):
+    """Remember the rows changed by this session."""
+    changed = {
+        row_key(obj) for obj in list(session.dirty) + list(session.deleted)
+        if sqla.inspect(obj).mapper.version_id_col is not None
+    }
+    if changed:
+        session.info.setdefault(session_key, set()).update(changed)
+
+
+@sqla.event.listens_for(so.Session, 'after_commit')
+def discard_stale_etags(session):
+    """Forget the ETags that depend on rows changed by this session."""
+    changed = session.info.pop(session_key, None)
+    if changed and len(etag_cache):
+        etag_cache.discard_if(
+            lambda key, value: not changed.isdisjoint(value[1]),
+        )
+
+
+@sqla.event.listens_for(so.Session, 'after_rollback')
+def keep_etags(session):
+    session.info.pop(session_key, None)
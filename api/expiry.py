@@ -0,0 +1,93 @@
+import heapq
+from datetime import timezone
+from threading import Lock
+from threading import Thread
+from time import sleep
+
+
+class ExpirySchedule:
+    """In-process schedule of upcoming mission expirations.
+
+    Holds ``(expired, mission_id)`` pairs in a heap for the missions that
+    expire in the next ``lookahead`` seconds. The owner is responsible for
+    reloading the heap from the database whenever `needs_load` returns
+    true, and for adding missions that are published in between. Entries
+    for missions that changed status before expiring are left in place,
+    expiring them again must be a no-op.
+    """
+
+    def __init__(self, interval=60, lookahead=3600, batch_size=500):
+        self._heap = []
+        self._lock = Lock()
+        self._thread = None
+        self.configure(interval, lookahead, batch_size)
+
+    def configure(self, interval, lookahead, batch_size):
+        """Change the schedule settings. Loaded entries are discarded."""
+        with self._lock:
+            self.interval = interval
+            self.lookahead = lookahead
+            self.batch_size = batch_size
+            self._heap = []
+            self._loaded_until = None
+
+    @staticmethod
+    def _naive_utc(expired):
+        if expired.tzinfo is not None:
+            expired = expired.astimezone(timezone.utc).replace(tzinfo=None)
+        return expired
+
+    def needs_load(self, now):
+        return self._loaded_until is None or now >= self._loaded_until
+
+    def load(self, rows, until):
+        """Replace the schedule with ``(expired, mission_id)`` rows that
+        cover every expiration before `until`."""
+        heap = [(self._naive_utc(expired), id) for expired, id in rows]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+            self._loaded_until = until
+
+    def add(self, mission_id, expired):
+        """Schedule a newly published mission."""
+        expired = self._naive_utc(expired)
+        with self._lock:
+            if self._loaded_until is not None and \
+                    expired < self._loaded_until:
+                heapq.heappush(self._heap, (expired, mission_id))
+
+    def pop_due(self, now):
+        """Remove and return the ids of the missions expired at `now`."""
+        ids = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                ids.append(heapq.heappop(self._heap)[1])
+        return ids
+
+    def start(self, app, task):
+        """Call `task` every `interval` seconds from a background thread.
+
+        The thread is started once per process. An interval of zero
+        disables it, leaving expirations to the `expire-missions` command.
+        """
+        with self._lock:
+            if self._thread is not None or self.interval <= 0:
+                return
+            self._thread = Thread(
+                target=self._run, args=(app, task), daemon=True,
+                name='mission-expiry',
+            )
+        self._thread.start()
+
+    def _run(self, app, task):  # pragma: no cover
+        while True:
+            sleep(self.interval)
+            with app.app_context():
+                try:
+                    task()
+                except Exception:
+                    app.logger.exception('Could not expire missions')
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,24 @@
+from marshmallow import fields
+from marshmallow_sqlalchemy import ModelConverter
+from sqlalchemy import types
+
+
+class UTCDateTime(fields.DateTime):
+    """Date and time in UTC.
+
+    Values are dumped as `datetime` objects, which the JSON provider
+    encodes in ISO 8601 format with a `Z` suffix. Naive values are assumed
+    to be in UTC, which is how the database stores them.
+    """
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        return value
+
+
+class UTCModelConverter(ModelConverter):
+    """Model converter that maps datetime columns to `UTCDateTime`."""
+
+    SQLA_TYPE_MAPPING = {
+        **ModelConverter.SQLA_TYPE_MAPPING,
+        types.DateTime: UTCDateTime,
+    }
@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+
+def default(o):
+    if isinstance(o, Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not serializable')
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider that encodes with orjson.
+
+    Datetimes are encoded in ISO 8601 format. Naive datetimes are assumed to
+    be in UTC, and UTC is written with a `Z` suffix, so that
+    `datetime(2023, 3, 20, 3, 28)` becomes `"2023-03-20T03:28:00Z"`.
+    Dictionaries keep their key order, so responses follow the order of the
+    schema fields.
+    """
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | \
+        orjson.OPT_NON_STR_KEYS
+
+    def _dumps(self, obj):
+        option = self.option
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self._dumps(obj), mimetype='application/json',
+        )
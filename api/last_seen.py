@@ -0,0 +1,54 @@
+from threading import Lock
+from time import monotonic
+
+
+class LastSeenBuffer:
+    """Write-behind buffer for ``User.last_seen`` updates.
+
+    Pings are collected in memory as ``{user_id: timestamp}`` and written
+    to the database in a single bulk UPDATE once ``flush_interval`` seconds
+    have passed since the previous flush, so that authenticated read-only
+    requests never need a write transaction.
+    """
+
+    def __init__(self, flush_interval=30):
+        self._pending = {}
+        self._lock = Lock()
+        self.configure(flush_interval)
+
+    def configure(self, flush_interval):
+        """Change the flush interval. Pending updates are discarded."""
+        with self._lock:
+            self.flush_interval = flush_interval
+            self._pending.clear()
+            self._flushed_at = monotonic()
+
+    def add(self, user_id, timestamp):
+        with self._lock:
+            self._pending[user_id] = timestamp
+
+    def get(self, user_id):
+        return self._pending.get(user_id)
+
+    def due(self):
+        return bool(self._pending) and \
+            monotonic() - self._flushed_at >= self.flush_interval
+
+    def drain(self):
+        """Return the pending updates as bulk UPDATE parameters."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = monotonic()
+        return [
+            {'id': user_id, 'last_seen': timestamp}
+            for user_id, timestamp in pending.items()
+        ]
+
+    def restore(self, rows):
+        """Put back updates that could not be written."""
+        with self._lock:
+            for row in rows:
+                self._pending.setdefault(row['id'], row['last_seen'])
+
+    def __len__(self):
+        return len(self._pending)
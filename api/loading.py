@@ -0,0 +1,54 @@
+from typing import Dict
+from typing import Tuple
+
+import sqlalchemy as sqla
+from marshmallow import fields
+from sqlalchemy import orm as so
+
+load_options_cache: Dict[object, Tuple] = {}
+
+
+def eager_load_options(schema, model=None):
+    """Return loader options for everything `schema` dumps from `model`.
+
+    The nested fields of the schema are matched to relationships of the
+    model, which are loaded in the same query when they reference a single
+    object (`joinedload`), or with one extra query per relationship when
+    they are collections (`selectinload`). Relationships found in nested
+    schemas are loaded recursively, so that dumping any number of objects
+    costs a fixed number of queries.
+
+    The options are computed once per schema.
+    """
+    if schema in load_options_cache:
+        return load_options_cache[schema]
+    if model is None:
+        model = getattr(schema.opts, 'model', None)
+    options = ()
+    if model is not None:
+        options = tuple(_load_options(schema, model, (type(schema),)))
+    load_options_cache[schema] = options
+    return options
+
+
+def _load_options(schema, model, path):
+    relationships = sqla.inspect(model).relationships
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, fields.Nested):
+            continue
+        relationship = relationships.get(field.attribute or name)
+        if relationship is None or \
+                relationship.lazy in ('write_only', 'dynamic'):
+            continue
+        nested = field.schema
+        if type(nested) in path:  # pragma: no cover
+            continue  # recursive schemas are left to lazy loading
+        target = relationship.mapper.class_
+        loader = so.selectinload if relationship.uselist else so.joinedload
+        option = loader(getattr(model, relationship.key))
+        children = tuple(
+            _load_options(nested, target, path + (type(nested),)),
+        )
+        if children:
+            option = option.options(*children)
+        yield option
@@ -1,24 +1,35 @@
 from datetime import datetime
 
+import sqlalchemy as sa
 from apifairy import authenticate
 from apifairy import body
 from apifairy import response
 from apifairy.decorators import other_responses
 from flask import abort
 from flask import Blueprint
+from sqlalchemy.exc import IntegrityError
 
 from api import db
+from api.app import expiry_schedule
 from api.auth import token_auth
+from api.decorators import conditional_response
 from api.decorators import paginated_response
 from api.enums import Action
 from api.enums import Role
 from api.enums import Status
+from api.enums import TotalMode
+from api.etags import forget_etags
+from api.loading import eager_load_options
 from api.models import Account
 from api.models import ChangeLog
 from api.models import Mission
+from api.models import MissionStatusCount
 from api.schemas import AccountSchema
 from api.schemas import DateTimePaginationSchema
 from api.schemas import EmptySchema
+from api.schemas import MissionBulkPublishResultSchema
+from api.schemas import MissionBulkPublishSchema
+from api.schemas import MissionMultAcceptsResultSchema
 from api.schemas import MissionMultAcceptsSchema
 from api.schemas import Missions_count_schema
 from api.schemas import MissionSchema
@@ -26,7 +37,10 @@ from api.schemas import MissionSchema
 missions = Blueprint('missions', __name__)
 mission_schema = MissionSchema()
 missions_schema = MissionSchema(many=True)
+bulk_publish_schema = MissionBulkPublishSchema()
+bulk_publish_result_schema = MissionBulkPublishResultSchema()
 multiaccept_shema = MissionMultAcceptsSchema()
+multiaccept_result_schema = MissionMultAcceptsResultSchema()
 update_account_schema = AccountSchema(partial=True)
 missions_count_schema = Missions_count_schema()
 
@@ -63,55 +77,160 @@ def publish(args, id):
         if args.get('expired').timestamp() < datetime.utcnow().timestamp():
             abort(400, 'Expired time is invalid')
     # Check if mission has already published
-    # get list of all mission from database
-    lst = (
-        db.session.query(Mission).filter_by(
-            publisher_id=account.id,
-        ).all()
+    fingerprint = Mission.make_fingerprint(
+        args.get('title'), args.get('galaxy'), args.get('created'),
+    )
+    duplicate = db.session.scalar(
+        sa.select(Mission.id).where(
+            Mission.publisher_id == account.id,
+            Mission.fingerprint == fingerprint,
+            Mission.status == Status.PUBLISHED.value,
+        ).limit(1),
     )
-    if type(lst) is Mission:
-        lst = [lst]
-    for mission in lst:
-        if mission.status == Status.PUBLISHED.value:
-            result = [mission.title == args.get('title')]
-            result.append(mission.galaxy == args.get('galaxy'))
-            result.append(
-                mission.created == args.get(
-                    'created',
-                ).replace(tzinfo=None),
-            )
-            if all(result):
-                abort(400, 'Mission already published')
+    if duplicate is not None:
+        abort(400, 'Mission already published')
 
     mission = Mission(publisher=account, **args)
     db.session.add(mission)
-    db.session.commit()
+    try:
+        # assigns the id, committed with the change below
+        db.session.flush()
+    except IntegrityError:
+        # Lost a race against an identical request
+        db.session.rollback()
+        abort(400, 'Mission already published')
 
     # Track changes
-    change = ChangeLog(
-        object_type=type(mission).__name__,
-        object_id=mission.id,
-        operation=Action.INSERT.value,
-        requester_id=user.id,
-        attribute_name='',
-        old_value='',
-        new_value=f'Add Mission ID: {mission.id}',
-    )
+    ChangeLog.write([{
+        'object_type': type(mission).__name__,
+        'object_id': mission.id,
+        'operation': Action.INSERT.value,
+        'requester_id': user.id,
+        'attribute_name': '',
+        'old_value': '',
+        'new_value': f'Add Mission ID: {mission.id}',
+    }])
 
     # Save data
-    db.session.add(change)
+    MissionStatusCount.adjust({Status.PUBLISHED.value: 1})
     db.session.commit()
+    expiry_schedule.add(mission.id, mission.expired)
     return mission
 
 
+@missions.route('/accounts/<int:id>/publish_missions', methods=['POST'])
+@authenticate(token_auth)
+@body(bulk_publish_schema)
+@response(bulk_publish_result_schema)
+@other_responses({
+    400: 'Mission already published',
+    401: 'User cannot edit account info for others',
+    403: 'Account is not activated',
+    404: 'Account not found',
+})
+def publish_bulk(args, id):
+    """Publish several missions from an account
+    Every mission is checked with the same rules as publishing it alone.
+    The missions that pass the checks are published together, and the
+    response reports the result for each requested mission, in the order
+    given.
+    """
+
+    # Issuer
+    user = token_auth.current_user()
+
+    # Setup
+    account = db.session.get(Account, id) or abort(404)
+
+    # Gatekeeper
+    if account.owner_id != user.id:
+        abort(401)
+    if not account.is_activated():
+        abort(403)
+
+    # Check which missions have already been published, all at once
+    payloads = args['missions']
+    fingerprints = [
+        Mission.make_fingerprint(
+            payload.get('title'), payload.get('galaxy'),
+            payload.get('created'),
+        ) for payload in payloads
+    ]
+    seen = set(db.session.scalars(
+        sa.select(Mission.fingerprint).where(
+            Mission.publisher_id == account.id,
+            Mission.fingerprint.in_(set(fingerprints)),
+            Mission.status == Status.PUBLISHED.value,
+        ),
+    ))
+
+    results = []
+    missions = []
+    now = datetime.utcnow().timestamp()
+    for payload, fingerprint in zip(payloads, fingerprints):
+        if payload.get('expired') is not None and \
+                payload.get('expired').timestamp() < now:
+            error = 'Expired time is invalid'
+        elif fingerprint in seen:
+            error = 'Mission already published'
+        else:
+            seen.add(fingerprint)
+            mission = Mission(publisher=account, **payload)
+            missions.append(mission)
+            results.append(mission)
+            continue
+        results.append({
+            'id': None, 'published': False, 'code': 400, 'message': error,
+        })
+
+    if missions:
+        # the missions are inserted together to learn their ids
+        db.session.add_all(missions)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Lost a race against an identical request
+            db.session.rollback()
+            abort(400, 'Mission already published')
+
+        # Track changes
+        ChangeLog.write([
+            {
+                'object_type': type(mission).__name__,
+                'object_id': mission.id,
+                'operation': Action.INSERT.value,
+                'requester_id': user.id,
+                'attribute_name': '',
+                'old_value': '',
+                'new_value': f'Add Mission ID: {mission.id}',
+            } for mission in missions
+        ])
+        MissionStatusCount.adjust({Status.PUBLISHED.value: len(missions)})
+        expirations = [(mission.id, mission.expired) for mission in missions]
+
+        # Save data
+        db.session.commit()
+        for mission_id, expired in expirations:
+            expiry_schedule.add(mission_id, expired)
+
+    return {'results': [
+        {'id': result.id, 'published': True}
+        if isinstance(result, Mission) else result
+        for result in results
+    ]}
+
+
 @missions.route('/missions/<int:id>', methods=['GET'])
 @authenticate(token_auth)
 @response(mission_schema)
 @other_responses({404: 'Mission not found'})
+@conditional_response(mission_schema)
 def get(id):
     """Retrieve a mission by id
     """
-    return db.session.get(Mission, id) or abort(404)
+    return db.session.get(
+        Mission, id, options=eager_load_options(mission_schema),
+    ) or abort(404)
 
 
 @missions.route('/missions/count', methods=['GET'])
@@ -119,20 +238,10 @@ def get(id):
 def get_missions_count():
     """Retrieve count of missions
     """
-    num_missions_published = db.session.query(
-        Mission,
-    ).filter(Mission.status == 'published').count()
-    num_missions_completed = db.session.query(
-        Mission,
-    ).filter(Mission.status == 'completed').count()
-    num_missions_done = db.session.query(
-        Mission,
-    ).filter(Mission.status == 'done').count()
+    counts = MissionStatusCount.counts()
     return {
-        'num_missions_published': num_missions_published,
-        'num_missions_completed': num_missions_completed,
-        'num_missions_done': num_missions_done,
-
+        f'num_missions_{status.value}': counts.get(status.value, 0)
+        for status in Status
     }
 
 
@@ -142,6 +251,7 @@ def get_missions_count():
     missions_schema, order_by=Mission.created,
     order_direction='desc',
     pagination_schema=DateTimePaginationSchema,
+    total_mode=TotalMode.CACHED.value,
 )
 def get_byGalaxy(galaxy):
     """Retrieve list of missions by galaxy
@@ -227,6 +337,112 @@ def get_published():
     )
 
 
+@missions.route('/missions/accept', methods=['POST'])
+@authenticate(token_auth)
+@body(multiaccept_shema)
+@response(multiaccept_result_schema)
+@other_responses({401: 'Publisher access cannot accepts mission'})
+def accept(args):
+    """Accept a list of missions
+    Every mission is checked with the same rules as the `accepted` action
+    of the mission status update endpoint. The missions that pass the
+    checks are accepted together, and the response reports the result for
+    each requested mission, in the order given.
+    """
+    # Issuer
+    user = token_auth.current_user()
+
+    # Gatekeeper
+    if user.role == Role.MISSION_PUBLISHER.value:
+        abort(401)  # Publisher access cannot accepts mission
+
+    # Setup
+    ids = args['mission_id_list']
+    found = {
+        mission.id: mission for mission in db.session.scalars(
+            Mission.select().where(Mission.id.in_(ids)),
+        )
+    }
+    now = datetime.utcnow()
+
+    # Gatekeeper, for each mission
+    errors = []
+    candidates = []
+    for id in ids:
+        mission = found.get(id)
+        if mission is None:
+            errors.append((404, 'Mission not found'))
+        elif Status.isTerminal(mission.status) or \
+                Status.ACCEPTED.value not in mission.next_step or \
+                id in candidates:
+            errors.append((400, 'Operation not allowed'))
+        elif mission.expired < now:
+            errors.append((403, 'Mission expired'))
+        else:
+            errors.append(None)
+            candidates.append(id)
+
+    # Modification, only of the missions no other request has changed
+    # since they were read
+    prev_runners = {
+        id: '' if found[id].runner_id is None else found[id].runner_id
+        for id in candidates
+    }
+    accepted = []
+    if candidates:
+        accepted = db.session.scalars(
+            sa.update(Mission).where(
+                Mission.id.in_(candidates),
+                Mission.status == Status.PUBLISHED.value,
+                Mission.expired >= now,
+            ).values(
+                status=Status.ACCEPTED.value, runner_id=user.id,
+                version=Mission.version + 1,
+            ).returning(Mission.id),
+        ).all()
+        forget_etags(Mission, accepted)
+
+    # Track changes, the UPDATE above is not seen by `api.audit`
+    changes = []
+    for id in accepted:
+        for key, old_value, new_value in [
+            ('status', Status.PUBLISHED.value, Status.ACCEPTED.value),
+            ('runner', prev_runners[id], user.id),
+        ]:
+            changes.append({
+                'object_type': Mission.__name__,
+                'object_id': id,
+                'operation': Action.UPDATE.value,
+                'requester_id': user.id,
+                'attribute_name': key,
+                'old_value': old_value,
+                'new_value': new_value,
+            })
+
+    # Save data
+    if accepted:
+        MissionStatusCount.adjust({
+            Status.PUBLISHED.value: -len(accepted),
+            Status.ACCEPTED.value: len(accepted),
+        })
+        ChangeLog.write(changes)
+        db.session.commit()
+
+    results = []
+    for id, error in zip(ids, errors):
+        if error is not None:
+            code, message = error
+        elif id in accepted:
+            results.append({'id': id, 'accepted': True})
+            continue
+        else:
+            code, message = 409, 'Mission was updated by another request'
+        results.append({
+            'id': id, 'accepted': False, 'code': code, 'message': message,
+        })
+    return {'results': results}
+
+
 @missions.route('/missions/<int:id>/<string:action>', methods=['POST'])
 @authenticate(token_auth)
 @response(
@@ -238,6 +454,7 @@ def get_published():
     401: 'Operation is not for you to complete',
     403: 'Mission expired',
     404: 'Mission not found',
+    409: 'Mission was updated by another request',
 })
 def next_step(id, action):
     """Update mission status
@@ -280,6 +497,19 @@ def next_step(id, action):
         prev['runner'] = '' if mission.runner is None else mission.runner.id
         data['runner'] = None
 
+        # The publisher may have published an identical mission since this
+        # one was accepted, and only one of them can be on the market
+        duplicate = db.session.scalar(
+            sa.select(Mission.id).where(
+                Mission.publisher_id == mission.publisher_id,
+                Mission.fingerprint == mission.fingerprint,
+                Mission.status == Status.PUBLISHED.value,
+                Mission.id != mission.id,
+            ).limit(1),
+        )
+        if duplicate is not None:
+            abort(409, 'An identical mission is already published')
+
     if action == Status.ACCEPTED.value:
         if mission.expired < datetime.utcnow():
             abort(403)  # Only consider expiry when accepts mission.
@@ -299,25 +529,42 @@ def next_step(id, action):
         if mission.publisher.owner_id != user.id:
             abort(401)
 
-    # Modification
-    mission.update(data)
-
-    # Track changes
-    for key in dict(data).keys():
-        if getattr(mission, key) is not None:
-            prev_val = prev[key]
-            new_val = getattr(mission, key).id if key == 'runner' \
-                else getattr(mission, key)
-            change = ChangeLog(
-                object_type=type(mission).__name__,
-                object_id=mission.id,
-                operation=Action.UPDATE.value,
-                requester_id=user.id,
-                attribute_name=key,
-                old_value=prev_val,
-                new_value=new_val,
-            )
-            db.session.add(change)
+    # Modification, as a single conditional UPDATE that fails if another
+    # request changed the status since the mission was read
+    values = {'status': action}
+    if 'runner' in data:
+        values['runner_id'] = getattr(data['runner'], 'id', None)
+    try:
+        updated = db.session.execute(
+            sa.update(Mission).where(
+                Mission.id == mission.id, Mission.status == prev['status'],
+            ).values(version=Mission.version + 1, **values),
+        ).rowcount
+    except IntegrityError:
+        # Lost a race against the publication of an identical mission
+        db.session.rollback()
+        abort(409, 'An identical mission is already published')
+    if updated != 1:
+        db.session.rollback()
+        abort(409, 'Mission was updated by another request')
+    forget_etags(Mission, [mission.id])
+    MissionStatusCount.adjust({prev['status']: -1, action: 1})
+
+    # Track changes, the UPDATE above is not seen by `api.audit`
+    ChangeLog.write([
+        {
+            'object_type': type(mission).__name__,
+            'object_id': mission.id,
+            'operation': Action.UPDATE.value,
+            'requester_id': user.id,
+            'attribute_name': key,
+            'old_value': prev[key],
+            'new_value': value.id if key == 'runner' else value,
+        }
+        for key, value in data.items() if value is not None
+    ])
 
     # Save data
     db.session.commit()
+    if action == Status.PUBLISHED.value:
+        expiry_schedule.add(mission.id, mission.expired)
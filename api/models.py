@@ -1,7 +1,9 @@
 import secrets
 from datetime import datetime
 from datetime import timedelta
+from functools import lru_cache
 from hashlib import md5
+from hashlib import sha256
 from time import time
 
 import jwt
@@ -9,73 +11,274 @@ import sqlalchemy as sa
 from flask import current_app
 from flask import url_for
 from sqlalchemy import orm as so
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from werkzeug.security import check_password_hash
-from werkzeug.security import generate_password_hash
 
+from api.app import audit_queue
 from api.app import db
+from api.app import expiry_schedule
+from api.app import last_seen_buffer
+from api.app import password_hasher
+from api.app import revoked_tokens
+from api.app import token_cache
+from api.enums import Action
 from api.enums import Role
 from api.enums import Status
+from api.etags import forget_etags
 
 BaseModel: DeclarativeMeta = db.Model
 
 
 class Updateable:
+    # attributes that are not recorded in the change log, see `api.audit`
+    audit_exclude = ('version',)
+
     def update(self, data):
         for attr, value in data.items():
             setattr(self, attr, value)
 
 
 class ChangeLog(BaseModel):
+    __table_args__ = (
+        # Listings of the admin change log endpoints, newest first, with
+        # the id breaking ties between entries of the same time
+        sa.Index(
+            'ix_change_log_object_type_object_id_timestamp',
+            'object_type', 'object_id', 'timestamp', 'id',
+        ),
+        sa.Index(
+            'ix_change_log_requester_id_timestamp',
+            'requester_id', 'timestamp', 'id',
+        ),
+        sa.Index('ix_change_log_timestamp', 'timestamp', 'id'),
+    )
+
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     object_type: so.Mapped[str] = so.mapped_column(sa.String(64))
     object_id: so.Mapped[int] = so.mapped_column(index=True)
     operation: so.Mapped[str] = so.mapped_column(sa.String(10))
-    requester_id: so.Mapped[int] = so.mapped_column(index=True)
+    requester_id: so.Mapped[int] = so.mapped_column()
     timestamp: so.Mapped[datetime] = so.mapped_column(default=datetime.utcnow)
     attribute_name: so.Mapped[str] = so.mapped_column(sa.String(64))
     old_value: so.Mapped[str] = so.mapped_column(sa.String(255))
     new_value: so.Mapped[str] = so.mapped_column(sa.String(255))
 
+    # rows per INSERT statement, well below the parameter limit of SQLite
+    write_batch_size = 100
+
+    @staticmethod
+    def format_value(value):
+        """Return the text stored for an attribute value."""
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return str(int(value))
+        return str(value)
+
+    @staticmethod
+    def write(changes, session=None):
+        """Record change log rows given as dictionaries.
+
+        `timestamp` defaults to the current time and values are formatted
+        with `format_value`. The rows are inserted in the transaction of
+        `session`, or handed to `audit_queue` when it commits if the queue
+        is enabled and its writer thread runs in this process.
+        """
+        if not changes:
+            return
+        if session is None:
+            session = db.session
+        now = datetime.utcnow()
+        rows = [
+            {
+                **change,
+                'timestamp': change.get('timestamp', now),
+                'old_value': ChangeLog.format_value(change['old_value']),
+                'new_value': ChangeLog.format_value(change['new_value']),
+            } for change in changes
+        ]
+        if audit_queue.enabled and audit_queue.running:
+            audit_queue.stage(session, rows)
+        else:
+            ChangeLog.insert(rows, session.connection())
+
+    @staticmethod
+    def insert(rows, connection=None):
+        """Insert formatted rows with multi-row INSERT statements, without
+        creating ORM objects."""
+        if connection is None:
+            connection = db.session.connection()
+        size = ChangeLog.write_batch_size
+        for i in range(0, len(rows), size):
+            connection.execute(
+                ChangeLog.__table__.insert().values(rows[i:i + size]),
+            )
+
+    @staticmethod
+    def write_queued(rows):
+        """Insert rows taken from `audit_queue` in their own transaction."""
+        ChangeLog.insert(rows)
+        db.session.commit()
+
 
 class Token(BaseModel):
+    """Access and refresh token pair.
+
+    Only SHA-256 digests of the tokens are stored. The tokens themselves
+    are available as `issued_access_token` and `issued_refresh_token` on
+    the instance that generated them, so that they can be returned to the
+    client once.
+    """
     __tablename__ = 'tokens'
+    __table_args__ = (
+        sa.Index(
+            'ix_tokens_refresh_token_access_token',
+            'refresh_token', 'access_token',
+        ),
+    )
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
-    access_token: so.Mapped[str] = so.mapped_column(sa.String(64), index=True)
+    access_token: so.Mapped[bytes] = so.mapped_column(
+        sa.LargeBinary(32), index=True, unique=True,
+    )
     access_expiration: so.Mapped[datetime]
-    refresh_token: so.Mapped[str] = so.mapped_column(sa.String(64), index=True)
-    refresh_expiration: so.Mapped[datetime]
+    refresh_token: so.Mapped[bytes] = so.mapped_column(sa.LargeBinary(32))
+    refresh_expiration: so.Mapped[datetime] = so.mapped_column(index=True)
     user_id: so.Mapped[int] = so.mapped_column(
         sa.ForeignKey('users.id'), index=True,
     )
 
     user: so.Mapped['User'] = so.relationship(back_populates='tokens')
 
+    @staticmethod
+    def digest(token):
+        """Return the value stored in the database for a client token."""
+        return sha256(token.encode('utf-8')).digest()
+
     def generate(self):
-        self.access_token = secrets.token_urlsafe()
         self.access_expiration = datetime.utcnow() + \
             timedelta(minutes=current_app.config['ACCESS_TOKEN_MINUTES'])
-        self.refresh_token = secrets.token_urlsafe()
         self.refresh_expiration = datetime.utcnow() + \
             timedelta(days=current_app.config['REFRESH_TOKEN_DAYS'])
+        access_token = secrets.token_urlsafe()
+        if current_app.config['ACCESS_TOKEN_SIGNED']:
+            access_token = jwt.encode(
+                {
+                    'sub': str(self.user.id),
+                    'jti': access_token,
+                    'exp': self.access_expiration,
+                },
+                current_app.config['SECRET_KEY'],
+                algorithm='HS256',
+            )
+        self.issued_access_token = access_token
+        self.issued_refresh_token = secrets.token_urlsafe()
+        self.access_token = Token.digest(self.issued_access_token)
+        self.refresh_token = Token.digest(self.issued_refresh_token)
 
     def expire(self, delay=None):
         if delay is None:  # pragma: no branch
             # 5 second delay to allow simultaneous requests
             delay = 5 if not current_app.testing else 0
+        if current_app.config['ACCESS_TOKEN_SIGNED']:
+            RevokedToken.revoke(
+                self.access_token, self.access_expiration, delay=delay,
+            )
         self.access_expiration = datetime.utcnow() + timedelta(seconds=delay)
         self.refresh_expiration = datetime.utcnow() + timedelta(seconds=delay)
+        token_cache.pop(self.access_token)
 
     @staticmethod
-    def clean():
-        """Remove any tokens that have been expired for more than a day."""
+    def clean(batch_size=None):
+        """Remove any tokens that have been expired for more than a day.
+
+        When `batch_size` is given the tokens are deleted in batches of that
+        size, each in its own transaction, so that the table is never locked
+        for long. Returns the number of deleted tokens.
+        """
         yesterday = datetime.utcnow() - timedelta(days=1)
         db.session.execute(
-            Token.delete().where(
-                Token.refresh_expiration < yesterday,
+            RevokedToken.delete().where(
+                RevokedToken.expiration < yesterday,
+            ),
+        )
+        if batch_size is None:
+            return db.session.execute(
+                Token.delete().where(
+                    Token.refresh_expiration < yesterday,
+                ),
+            ).rowcount
+
+        deleted = 0
+        while True:
+            ids = db.session.scalars(
+                sa.select(Token.id).where(
+                    Token.refresh_expiration < yesterday,
+                ).limit(batch_size),
+            ).all()
+            if ids:
+                db.session.execute(Token.delete().where(Token.id.in_(ids)))
+                db.session.commit()
+                deleted += len(ids)
+            if len(ids) < batch_size:
+                return deleted
+
+
+class RevokedToken(BaseModel):
+    """Signed access tokens revoked before their expiration.
+
+    Every worker keeps a copy of this table in memory, see `is_revoked`.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    access_token: so.Mapped[bytes] = so.mapped_column(sa.LargeBinary(32))
+    revoked: so.Mapped[datetime]
+    expiration: so.Mapped[datetime] = so.mapped_column(index=True)
+
+    @staticmethod
+    def revoke(access_token, expiration, delay=0):
+        revoked = datetime.utcnow() + timedelta(seconds=delay)
+        db.session.add(
+            RevokedToken(
+                access_token=access_token, revoked=revoked,
+                expiration=expiration,
             ),
         )
+        # mirrored once the revocation is stored, see `mirror_revocations`
+        revoked_tokens.stage(db.session, access_token, revoked, expiration)
+
+    @staticmethod
+    def is_revoked(access_token):
+        if revoked_tokens.needs_sync():
+            RevokedToken.sync()
+        revoked = revoked_tokens.get(access_token)
+        return revoked is not None and revoked <= datetime.utcnow()
+
+    @staticmethod
+    def sync():
+        """Load the revocations recorded by every worker.
+
+        All the rows of tokens that have not expired are read, rather than
+        the rows added since the last sync, because ids are not committed
+        in order and a row could be missed. Only tokens issued in the last
+        `ACCESS_TOKEN_MINUTES` are in that set, so it stays small.
+        """
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            sa.select(
+                RevokedToken.access_token, RevokedToken.revoked,
+                RevokedToken.expiration,
+            ).where(RevokedToken.expiration > now),
+        ).all()
+        for row in rows:
+            revoked_tokens.add(row.access_token, row.revoked, row.expiration)
+        revoked_tokens.synced(now)
+
+
+@lru_cache(maxsize=4096)
+def gravatar_digest(email):
+    return md5(email.lower().encode('utf-8')).hexdigest()
 
 
 class User(Updateable, BaseModel):
@@ -101,6 +304,14 @@ class User(Updateable, BaseModel):
     birthday: so.Mapped[datetime] = so.mapped_column(default=datetime.utcnow)
     last_seen: so.Mapped[datetime] = so.mapped_column(default=datetime.utcnow)
 
+    # Row version, incremented by every ORM update. Used for ETags. The
+    # default is set by the client, so that the ORM checks the row count of
+    # versioned UPDATEs instead of fetching the version with RETURNING,
+    # whose row count pysqlite does not report.
+    version: so.Mapped[int] = so.mapped_column(default=1)
+    __mapper_args__ = {'version_id_col': version}
+    audit_exclude = ('version', 'last_seen', 'password_hash')
+
     # Links
     # Back_populates link for default payment
     default_account_id: so.Mapped[int] = so.mapped_column(nullable=True)
@@ -113,6 +324,10 @@ class User(Updateable, BaseModel):
     missions_run: so.WriteOnlyMapped['Mission'] = so.relationship(
         back_populates='runner',
     )
+    default_account: so.Mapped['Account'] = so.relationship(
+        primaryjoin='foreign(User.default_account_id) == Account.id',
+        viewonly=True,
+    )
 
     def __repr__(self):  # pragma: no cover
         return f'<User {self.username}>'
@@ -123,7 +338,7 @@ class User(Updateable, BaseModel):
 
     @property
     def avatar_url(self):
-        digest = md5(self.email.lower().encode('utf-8')).hexdigest()
+        digest = gravatar_digest(self.email)
         return f'https://www.gravatar.com/avatar/{digest}?d=identicon'
 
     @property
@@ -132,20 +347,42 @@ class User(Updateable, BaseModel):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password)
-
-    @property
-    def default_account(self):
-        if self.default_account_id is not None:
-            return db.session.get(Account, self.default_account_id)
-        else:
-            return None
+        self.password_hash = password_hasher.hash(password)
 
     def verify_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
 
     def ping(self):
-        self.last_seen = datetime.utcnow()
+        """Record activity. The write is buffered, see `flush_last_seen`."""
+        now = datetime.utcnow()
+        last_seen = last_seen_buffer.get(self.id) or self.last_seen
+        resolution = timedelta(
+            seconds=current_app.config['LAST_SEEN_RESOLUTION_SECONDS'],
+        )
+        if last_seen is None or now - last_seen >= resolution:
+            last_seen_buffer.add(self.id, now)
+
+    @staticmethod
+    def flush_last_seen():
+        """Write all buffered pings in a single bulk UPDATE."""
+        rows = last_seen_buffer.drain()
+        if not rows:
+            return
+        # a table UPDATE rather than an ORM one, so that activity does not
+        # change the row version and the ETags of the user
+        users = User.__table__
+        statement = users.update().where(
+            users.c.id == sa.bindparam('user_id'),
+        ).values(last_seen=sa.bindparam('timestamp'))
+        try:
+            with db.begin() as session:
+                session.execute(statement, [
+                    {'user_id': row['id'], 'timestamp': row['last_seen']}
+                    for row in rows
+                ])
+        except SQLAlchemyError:
+            last_seen_buffer.restore(rows)
+            current_app.logger.exception('Could not update last_seen')
 
     def generate_auth_token(self):
         token = Token(user=self)
@@ -157,6 +394,21 @@ class User(Updateable, BaseModel):
 
     @staticmethod
     def verify_access_token(access_token, refresh_token=None):
+        if current_app.config['ACCESS_TOKEN_SIGNED']:
+            return User.verify_signed_access_token(access_token)
+
+        access_token = Token.digest(access_token)
+        cached = token_cache.get(access_token)
+        if cached is not None:
+            user_id, access_expiration = cached
+            if access_expiration > datetime.utcnow():
+                user = db.session.get(User, user_id)
+                if user:
+                    user.ping()
+                    return user
+            token_cache.pop(access_token)
+            return
+
         token = db.session.scalar(
             Token.select().filter_by(
                 access_token=access_token,
@@ -164,15 +416,42 @@ class User(Updateable, BaseModel):
         )
         if token:
             if token.access_expiration > datetime.utcnow():
+                token_cache.set(
+                    access_token, (token.user_id, token.access_expiration),
+                )
                 token.user.ping()
-                db.session.commit()
                 return token.user
 
+    @staticmethod
+    def verify_signed_access_token(access_token):
+        """Return the user of a signed access token.
+
+        The token is validated by its signature, expiry and the in-memory
+        revocation list, without reading the token tables. The user is
+        still loaded by primary key, because views need an ORM instance
+        for relationships, and so that role changes and deleted users take
+        effect before the token expires.
+        """
+        try:
+            data = jwt.decode(
+                access_token, current_app.config['SECRET_KEY'],
+                algorithms=['HS256'],
+            )
+        except jwt.PyJWTError:
+            return
+        if RevokedToken.is_revoked(Token.digest(access_token)):
+            return
+        user = db.session.get(User, int(data['sub']))
+        if user:
+            user.ping()
+            return user
+
     @staticmethod
     def verify_refresh_token(refresh_token, access_token):
         token = db.session.scalar(
             Token.select().filter_by(
-                refresh_token=refresh_token, access_token=access_token,
+                refresh_token=Token.digest(refresh_token),
+                access_token=Token.digest(access_token),
             ),
         )
         if token:
@@ -185,6 +464,16 @@ class User(Updateable, BaseModel):
             db.session.commit()
 
     def revoke_all(self):
+        token_cache.discard_if(lambda key, value: value[0] == self.id)
+        if current_app.config['ACCESS_TOKEN_SIGNED']:
+            active = db.session.execute(
+                sa.select(Token.access_token, Token.access_expiration).where(
+                    Token.user_id == self.id,
+                    Token.access_expiration > datetime.utcnow(),
+                ),
+            ).all()
+            for access_token, expiration in active:
+                RevokedToken.revoke(access_token, expiration)
         db.session.execute(Token.delete().where(Token.user == self))
 
     def generate_reset_token(self):
@@ -226,6 +515,13 @@ class Account(Updateable, BaseModel):
     lp_point: so.Mapped[int] = so.mapped_column(default=0)
     esi_id: so.Mapped[int] = so.mapped_column(nullable=False)
 
+    # Row version, incremented by every ORM update. Used for ETags. The
+    # default is set by the client, so that the ORM checks the row count of
+    # versioned UPDATEs instead of fetching the version with RETURNING,
+    # whose row count pysqlite does not report.
+    version: so.Mapped[int] = so.mapped_column(default=1)
+    __mapper_args__ = {'version_id_col': version}
+
     # Links
     # Back_populates link for account owner
     owner_id: so.Mapped[int] = so.mapped_column(
@@ -255,6 +551,31 @@ class Account(Updateable, BaseModel):
 
 class Mission(Updateable, BaseModel):
     __tablename__ = 'mission'
+    __table_args__ = (
+        # A publisher cannot have two identical missions on the market
+        sa.Index(
+            'ix_mission_publisher_id_fingerprint',
+            'publisher_id', 'fingerprint', unique=True,
+            sqlite_where=sa.text(f"status = '{Status.PUBLISHED.value}'"),
+            postgresql_where=sa.text(
+                f"status = '{Status.PUBLISHED.value}'",
+            ),
+        ),
+        # Mission listings filter on one of these columns and are sorted by
+        # creation date, these indexes return them already sorted
+        sa.Index('ix_mission_galaxy_created', 'galaxy', 'created'),
+        sa.Index('ix_mission_status_created', 'status', 'created'),
+        sa.Index('ix_mission_runner_id_created', 'runner_id', 'created'),
+        sa.Index(
+            'ix_mission_publisher_id_created', 'publisher_id', 'created',
+        ),
+        sa.Index(
+            'ix_mission_publisher_id_status_created',
+            'publisher_id', 'status', 'created',
+        ),
+        # Upcoming expirations of published missions, see `expire_due`
+        sa.Index('ix_mission_status_expired', 'status', 'expired'),
+    )
 
     # Basic Info
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
@@ -267,6 +588,17 @@ class Mission(Updateable, BaseModel):
     expired: so.Mapped[datetime]
     bounty: so.Mapped[int] = so.mapped_column(nullable=False)
     remark: so.Mapped[str] = so.mapped_column(sa.String(), nullable=True)
+    fingerprint: so.Mapped[bytes] = so.mapped_column(
+        sa.LargeBinary(32), nullable=True,
+    )
+
+    # Row version, incremented by every ORM update. Used for ETags. The
+    # default is set by the client, so that the ORM checks the row count of
+    # versioned UPDATEs instead of fetching the version with RETURNING,
+    # whose row count pysqlite does not report.
+    version: so.Mapped[int] = so.mapped_column(default=1)
+    __mapper_args__ = {'version_id_col': version}
+    audit_exclude = ('version', 'fingerprint')
 
     # Status Related
     status: so.Mapped[str] = so.mapped_column(
@@ -274,14 +606,14 @@ class Mission(Updateable, BaseModel):
     )
 
     publisher_id: so.Mapped[int] = so.mapped_column(
-        sa.ForeignKey(Account.id), index=True,
+        sa.ForeignKey(Account.id),
     )
     publisher: so.Mapped['Account'] = so.relationship(
         back_populates='missions_published',
     )
 
     runner_id: so.Mapped[int] = so.mapped_column(
-        sa.ForeignKey(User.id), index=True, nullable=True,
+        sa.ForeignKey(User.id), nullable=True,
     )
     runner: so.Mapped['User'] = so.relationship(back_populates='missions_run')
 
@@ -292,3 +624,169 @@ class Mission(Updateable, BaseModel):
     @property
     def next_step(self):
         return Status.next(self.status)
+
+    @staticmethod
+    def make_fingerprint(title, galaxy, created):
+        """Digest of the fields that identify a mission of a publisher."""
+        created = created.replace(tzinfo=None).isoformat()
+        return sha256(
+            '\x1f'.join([title, galaxy, created]).encode('utf-8'),
+        ).digest()
+
+    @staticmethod
+    def expire(ids, now):
+        """Move the given missions to the expired status.
+
+        Only missions that are still published and past their expiry time
+        at `now` are changed, with a single UPDATE. A ChangeLog entry with
+        a `requester_id` of 0 is recorded for each. Returns the ids of the
+        missions that were expired. The caller must commit.
+        """
+        expired = db.session.scalars(
+            sa.update(Mission).where(
+                Mission.id.in_(ids),
+                Mission.status == Status.PUBLISHED.value,
+                Mission.expired <= now,
+            ).values(
+                status=Status.EXPIRED.value, version=Mission.version + 1,
+            ).returning(Mission.id),
+        ).all()
+        if expired:
+            forget_etags(Mission, expired)
+            ChangeLog.write([
+                {
+                    'object_type': Mission.__name__,
+                    'object_id': id,
+                    'operation': Action.UPDATE.value,
+                    'requester_id': 0,
+                    'attribute_name': 'status',
+                    'old_value': Status.PUBLISHED.value,
+                    'new_value': Status.EXPIRED.value,
+                } for id in expired
+            ])
+            MissionStatusCount.adjust({
+                Status.PUBLISHED.value: -len(expired),
+                Status.EXPIRED.value: len(expired),
+            })
+        return expired
+
+    @staticmethod
+    def expire_due(now=None):
+        """Expire the published missions whose expiry time has passed.
+
+        The upcoming expirations are kept in `expiry_schedule`, which is
+        loaded from the database once every `EXPIRY_LOOKAHEAD_SECONDS`, so
+        that most calls do not query the mission table at all. Missions are
+        expired in batches of `EXPIRY_BATCH_SIZE`, each in its own
+        transaction. Returns the ids of the expired missions.
+        """
+        now = now or datetime.utcnow()
+        if expiry_schedule.needs_load(now):
+            until = now + timedelta(seconds=expiry_schedule.lookahead)
+            expiry_schedule.load(
+                db.session.execute(
+                    sa.select(Mission.expired, Mission.id).where(
+                        Mission.status == Status.PUBLISHED.value,
+                        Mission.expired < until,
+                    ),
+                ).all(),
+                until,
+            )
+        ids = expiry_schedule.pop_due(now)
+        expired = []
+        batch_size = expiry_schedule.batch_size
+        for i in range(0, len(ids), batch_size):
+            expired += Mission.expire(ids[i:i + batch_size], now)
+            db.session.commit()
+        return expired
+
+
+class MissionStatusCount(BaseModel):
+    """Number of missions in each status.
+
+    Endpoints that change the status of missions must call `adjust` in the
+    same transaction, so that the counts can be served without scanning
+    the mission table. There is a row for every status, created with the
+    table, by the migrations and by `rebuild`.
+    """
+    __tablename__ = 'mission_status_counts'
+
+    status: so.Mapped[str] = so.mapped_column(sa.String(20), primary_key=True)
+    count: so.Mapped[int] = so.mapped_column(default=0)
+
+    @staticmethod
+    def adjust(changes):
+        """Apply a `{status: delta}` mapping to the counters.
+
+        The counters are only updated, never inserted, so that concurrent
+        transactions do not conflict on the primary key.
+        """
+        for status, delta in changes.items():
+            if not delta:
+                continue
+            db.session.execute(
+                sa.update(MissionStatusCount).where(
+                    MissionStatusCount.status == status,
+                ).values(count=MissionStatusCount.count + delta),
+            )
+
+    @staticmethod
+    def counts():
+        """Return the number of missions in each status.
+
+        Falls back to a single GROUP BY over the missions when the counters
+        have not been populated.
+        """
+        rows = db.session.execute(
+            sa.select(MissionStatusCount.status, MissionStatusCount.count),
+        ).all()
+        if not rows:
+            rows = db.session.execute(
+                sa.select(Mission.status, sa.func.count()).group_by(
+                    Mission.status,
+                ),
+            ).all()
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def rebuild():
+        """Recompute every counter from the mission table."""
+        counts = {status.value: 0 for status in Status}
+        counts.update(
+            db.session.execute(
+                sa.select(Mission.status, sa.func.count()).group_by(
+                    Mission.status,
+                ),
+            ).all(),
+        )
+        db.session.execute(sa.delete(MissionStatusCount))
+        db.session.add_all([
+            MissionStatusCount(status=status, count=count)
+            for status, count in counts.items()
+        ])
+        return counts
+
+
+@sa.event.listens_for(MissionStatusCount.__table__, 'after_create')
+def seed_mission_status_counts(target, connection, **kw):
+    connection.execute(target.insert(), [
+        {'status': status.value, 'count': 0} for status in Status
+    ])
+
+
+@sa.event.listens_for(Mission, 'before_insert')
+@sa.event.listens_for(Mission, 'before_update')
+def set_mission_fingerprint(mapper, connection, mission):
+    mission.fingerprint = Mission.make_fingerprint(
+        mission.title, mission.galaxy, mission.created,
+    )
+
+
+@sa.event.listens_for(so.Session, 'after_commit')
+def mirror_revocations(session):
+    revoked_tokens.commit(session)
+
+
+@sa.event.listens_for(so.Session, 'after_rollback')
+def discard_revocations(session):
+    revoked_tokens.discard(session)
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError
+from threading import BoundedSemaphore
+from time import monotonic
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash
+from werkzeug.security import generate_password_hash
+
+
+class PasswordHasher:
+    """Password hashing with admission control.
+
+    Hash checks run on a pool of `workers` threads. At most `queue_size`
+    further checks may wait for a free thread, and a caller gives up with a
+    503 error when it cannot be admitted or does not get an answer within
+    `timeout` seconds, counted from the call, so that a burst of logins
+    cannot occupy every thread of the server with CPU-bound hashing.
+    """
+
+    def __init__(
+        self, method='pbkdf2:sha256:260000', workers=2, queue_size=16,
+        timeout=10,
+    ):
+        self._executor = None
+        self.configure(method, workers, queue_size, timeout)
+
+    def configure(self, method, workers, queue_size, timeout):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.method = method
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hasher',
+        )
+        self._slots = BoundedSemaphore(workers + queue_size)
+
+    def hash(self, password):
+        return generate_password_hash(password, method=self.method)
+
+    def check(self, password_hash, password):
+        deadline = monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ServiceUnavailable('Too many login attempts in progress.')
+        try:
+            future = self._executor.submit(
+                check_password_hash, password_hash, password,
+            )
+        except RuntimeError:  # pragma: no cover
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=max(deadline - monotonic(), 0))
+        except TimeoutError:
+            raise ServiceUnavailable('Too many login attempts in progress.')
+
+    def needs_rehash(self, password_hash):
+        """Whether a hash was made with other parameters than `method`."""
+        return password_hash.split('$', 1)[0] != self.method
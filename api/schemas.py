@@ -1,6 +1,7 @@
+from datetime import timezone
 from typing import Dict
 
-from marshmallow import post_dump
+from marshmallow import post_load
 from marshmallow import validate
 from marshmallow import validates
 from marshmallow import validates_schema
@@ -11,9 +12,13 @@ from api import ma
 from api.auth import token_auth
 from api.enums import Role
 from api.enums import Status
+from api.enums import TotalMode
+from api.fields import UTCModelConverter
 from api.models import Account
+from api.models import ChangeLog
 from api.models import Mission
 from api.models import User
+from api.serializers import compile_serializer
 # from .schemas import AccountSchema
 
 paginated_schema_cache: Dict[ma.Schema, ma.Schema] = {}
@@ -30,13 +35,36 @@ class DateTimePaginationSchema(ma.Schema):
     limit = ma.Integer()
     offset = ma.Integer()
     after = ma.DateTime(load_only=True)
+    cursor = ma.String(
+        load_only=True,
+        description='Resume the listing from the `next` cursor of the '
+        'previous page.',
+    )
+    total_mode = ma.String(
+        load_only=True,
+        validate=validate.OneOf([mode.value for mode in TotalMode]),
+        description='How to compute `total`: `exact`, `cached` (may be a '
+        'few seconds old), `estimated` (from the query planner) or `none` '
+        '(not computed, use `has_more`).',
+    )
     count = ma.Integer(dump_only=True)
-    total = ma.Integer(dump_only=True)
+    total = ma.Integer(dump_only=True, allow_none=True)
+    has_more = ma.Boolean(dump_only=True)
+    next = ma.String(
+        dump_only=True, allow_none=True,
+        description='Cursor of the next page, null on the last page.',
+    )
 
     @validates_schema
     def validate_schema(self, data, **kwargs):
         if data.get('offset') is not None and data.get('after') is not None:
             raise ValidationError('Cannot specify both offset and after')
+        if data.get('cursor') is not None and (
+            data.get('offset') is not None or data.get('after') is not None
+        ):
+            raise ValidationError(
+                'Cannot specify a cursor with offset or after',
+            )
 
 
 class StringPaginationSchema(ma.Schema):
@@ -46,13 +74,36 @@ class StringPaginationSchema(ma.Schema):
     limit = ma.Integer()
     offset = ma.Integer()
     after = ma.String(load_only=True)
+    cursor = ma.String(
+        load_only=True,
+        description='Resume the listing from the `next` cursor of the '
+        'previous page.',
+    )
+    total_mode = ma.String(
+        load_only=True,
+        validate=validate.OneOf([mode.value for mode in TotalMode]),
+        description='How to compute `total`: `exact`, `cached` (may be a '
+        'few seconds old), `estimated` (from the query planner) or `none` '
+        '(not computed, use `has_more`).',
+    )
     count = ma.Integer(dump_only=True)
-    total = ma.Integer(dump_only=True)
+    total = ma.Integer(dump_only=True, allow_none=True)
+    has_more = ma.Boolean(dump_only=True)
+    next = ma.String(
+        dump_only=True, allow_none=True,
+        description='Cursor of the next page, null on the last page.',
+    )
 
     @validates_schema
     def validate_schema(self, data, **kwargs):
         if data.get('offset') is not None and data.get('after') is not None:
             raise ValidationError('Cannot specify both offset and after')
+        if data.get('cursor') is not None and (
+            data.get('offset') is not None or data.get('after') is not None
+        ):
+            raise ValidationError(
+                'Cannot specify a cursor with offset or after',
+            )
 
 
 def PaginatedCollection(schema, pagination_schema=StringPaginationSchema):
@@ -66,6 +117,17 @@ def PaginatedCollection(schema, pagination_schema=StringPaginationSchema):
         pagination = ma.Nested(pagination_schema)
         data = ma.Nested(schema, many=True)
 
+        def dump(self, obj, *, many=None):
+            # the items are dumped with a serializer compiled from their
+            # schema, see `api.serializers.compile_serializer`
+            serializer = compile_serializer(self.fields['data'].schema)
+            return {
+                'pagination': self.fields['pagination'].schema.dump(
+                    obj['pagination'],
+                ),
+                'data': [serializer(item) for item in obj['data']],
+            }
+
     PaginatedSchema.__name__ = f'Paginated{schema.__class__.__name__}'
     paginated_schema_cache[schema] = PaginatedSchema
     return PaginatedSchema
@@ -74,6 +136,7 @@ def PaginatedCollection(schema, pagination_schema=StringPaginationSchema):
 class ExtAccountSchema(ma.SQLAlchemySchema):
     class Meta:
         model = Account
+        model_converter = UTCModelConverter
         ordered = True
         description = 'Shema to show only necessary information to others'
     id = ma.auto_field(dump_only=True)
@@ -92,6 +155,7 @@ class ExtAccountSchema(ma.SQLAlchemySchema):
 class UserSchema(ma.SQLAlchemySchema):
     class Meta:
         model = User
+        model_converter = UTCModelConverter
         ordered = True
         description = 'Schema that represent an user.'
 
@@ -167,12 +231,6 @@ class UserSchema(ma.SQLAlchemySchema):
         else:
             raise PermissionError('Only admin can update user role')
 
-    @post_dump
-    def fix_datetimes(self, data, **kwargs):
-        data['birthday'] += 'Z'
-        data['last_seen'] += 'Z'
-        return data
-
 
 class UpdateUserSchema(UserSchema):
     old_password = ma.String(
@@ -225,6 +283,7 @@ class UpdateUserRoleSchema(ma.Schema):
 class AccountSchema(ma.SQLAlchemySchema):
     class Meta:
         model = Account
+        model_converter = UTCModelConverter
         ordered = True
 
     id = ma.auto_field(dump_only=True)
@@ -261,11 +320,6 @@ class AccountSchema(ma.SQLAlchemySchema):
     )
     # missions_published
 
-    @post_dump
-    def fix_datetimes(self, data, **kwargs):
-        data['created'] += 'Z'
-        return data
-
 
 class UpdateOwnerShema(AccountSchema):
     owner = ma.Nested(UserSchema)
@@ -274,6 +328,7 @@ class UpdateOwnerShema(AccountSchema):
 class MissionSchema(ma.SQLAlchemySchema):
     class Meta:
         model = Mission
+        model_converter = UTCModelConverter
         ordered = True
 
     id = ma.auto_field(dump_only=True)
@@ -328,19 +383,122 @@ class MissionSchema(ma.SQLAlchemySchema):
                     Allowed roles are {Status.to_str()}.',
             )
 
-    @post_dump
-    def fix_datetimes(self, data, **kwargs):
-        data['published'] += 'Z'
-        data['created'] += 'Z'
-        data['expired'] += 'Z'
-        return data
+
+class MissionBulkPublishSchema(ma.Schema):
+    class Meta:
+        ordered = True
+
+    missions = ma.List(
+        ma.Nested(MissionSchema), required=True,
+        validate=validate.Length(min=1, max=100),
+        description='Missions to publish, at most 100.',
+    )
+
+
+class MissionPublishResultSchema(ma.Schema):
+    class Meta:
+        ordered = True
+
+    id = ma.Integer(
+        allow_none=True, description='ID of the published mission.',
+    )
+    published = ma.Boolean(description='Whether the mission was published.')
+    code = ma.Integer(
+        allow_none=True,
+        description='Status code publishing the mission alone would return, '
+                    'when it was not published.',
+    )
+    message = ma.String(
+        allow_none=True, description='Why the mission was not published.',
+    )
+
+
+class MissionBulkPublishResultSchema(ma.Schema):
+    class Meta:
+        ordered = True
+
+    results = ma.List(ma.Nested(MissionPublishResultSchema))
 
 
 class MissionMultAcceptsSchema(ma.Schema):
     class Meta:
         ordered = True
 
-    mission_id_list = ma.List(ma.Integer(), unique=True)
+    mission_id_list = ma.List(
+        ma.Integer(), required=True, validate=validate.Length(min=1, max=100),
+        description='IDs of the missions to accept, at most 100.',
+    )
+
+
+class MissionAcceptResultSchema(ma.Schema):
+    class Meta:
+        ordered = True
+
+    id = ma.Integer(description='Mission ID')
+    accepted = ma.Boolean(description='Whether the mission was accepted.')
+    code = ma.Integer(
+        allow_none=True,
+        description='Status code accepting the mission alone would return, '
+                    'when it was not accepted.',
+    )
+    message = ma.String(
+        allow_none=True, description='Why the mission was not accepted.',
+    )
+
+
+class MissionMultAcceptsResultSchema(ma.Schema):
+    class Meta:
+        ordered = True
+
+    results = ma.List(ma.Nested(MissionAcceptResultSchema))
+
+
+class ChangeLogSchema(ma.SQLAlchemySchema):
+    class Meta:
+        model = ChangeLog
+        model_converter = UTCModelConverter
+        ordered = True
+
+    id = ma.auto_field(dump_only=True)
+    object_type = ma.auto_field(
+        dump_only=True, description='The kind of object that changed.',
+    )
+    object_id = ma.auto_field(dump_only=True)
+    operation = ma.auto_field(dump_only=True)
+    requester_id = ma.auto_field(
+        dump_only=True,
+        description='The user that made the change, 0 for changes made by '
+        'the system.',
+    )
+    timestamp = ma.auto_field(dump_only=True)
+    attribute_name = ma.auto_field(dump_only=True)
+    old_value = ma.auto_field(dump_only=True)
+    new_value = ma.auto_field(dump_only=True)
+
+
+class ChangeLogWindowSchema(ma.Schema):
+    class Meta:
+        ordered = True
+
+    since = ma.DateTime(
+        description='Only return changes made at or after this time.',
+    )
+    until = ma.DateTime(
+        description='Only return changes made before this time.',
+    )
+
+    @post_load
+    def naive_utc(self, data, **kwargs):
+        # the database stores timestamps in UTC without a time zone
+        for key, value in data.items():
+            if value.tzinfo is not None:
+                data[key] = value.astimezone(timezone.utc).replace(
+                    tzinfo=None,
+                )
+        if data.get('since') is not None and data.get('until') is not None \
+                and data['since'] >= data['until']:
+            raise ValidationError('since must be earlier than until')
+        return data
 
 
 class TokenSchema(ma.Schema):
@@ -376,5 +534,10 @@ class Missions_count_schema(ma.Schema):
         ordered = True
 
     num_missions_published = ma.Number()
+    num_missions_accepted = ma.Number()
     num_missions_completed = ma.Number()
+    num_missions_paid = ma.Number()
+    num_missions_archived = ma.Number()
     num_missions_done = ma.Number()
+    num_missions_issue = ma.Number()
+    num_missions_expired = ma.Number()
@@ -0,0 +1,99 @@
+from typing import Callable
+from typing import Dict
+
+from marshmallow import fields
+from marshmallow import missing
+from marshmallow.decorators import POST_DUMP
+from marshmallow.decorators import PRE_DUMP
+
+from api.fields import UTCDateTime
+
+serializer_cache: Dict[object, Callable] = {}
+
+# fields whose output can be computed inline from the attribute value
+INLINE_FORMATS = {
+    fields.Integer: 'int(value)',
+    fields.Float: 'float(value)',
+    fields.Number: 'float(value)',
+    fields.String: 'value if value.__class__ is str else {field}._serialize('
+                   'value, {attr!r}, obj)',
+    fields.DateTime: 'value.isoformat()',
+    UTCDateTime: 'value',
+}
+
+
+def compile_serializer(schema):
+    """Return a function that dumps a single object like `schema.dump`.
+
+    The function is generated from the schema's declared fields, so that
+    the per-field lookups and dispatching done by marshmallow on every
+    object are resolved once. Simple fields are formatted inline, nested
+    schemas are compiled recursively and any other field falls back to its
+    own `serialize` method. `post_dump` hooks are applied to the result.
+
+    Schemas with `pre_dump` hooks or with `post_dump` hooks that receive
+    the whole collection are dumped by marshmallow itself.
+    """
+    if schema in serializer_cache:
+        return serializer_cache[schema]
+
+    hooks = schema._hooks
+    if hooks[(PRE_DUMP, False)] or hooks[(PRE_DUMP, True)] or \
+            hooks[(POST_DUMP, True)]:  # pragma: no cover
+        def serializer(obj):
+            return schema.dump(obj, many=False)
+        serializer_cache[schema] = serializer
+        return serializer
+
+    namespace = {'missing': missing}
+    lines = ['def serializer(obj):', '    ret = {}']
+    for i, (name, field) in enumerate(schema.dump_fields.items()):
+        field_name = f'field_{i}'
+        namespace[field_name] = field
+        attr = field.attribute or name
+        key = field.data_key if field.data_key is not None else name
+        inline = INLINE_FORMATS.get(type(field))
+        if getattr(field, 'as_string', False) or getattr(
+            field, 'format', None,
+        ) not in (None, 'iso', 'iso8601'):
+            inline = None
+
+        if isinstance(field, fields.Nested) and \
+                field.dump_default is missing:
+            nested_name = f'nested_{i}'
+            namespace[nested_name] = compile_serializer(field.schema)
+            if field.many:
+                inline = f'[{nested_name}(item) for item in value]'
+            else:
+                inline = f'{nested_name}(value)'
+        elif field.dump_default is not missing:
+            inline = None
+
+        if inline is None:
+            lines += [
+                f'    value = {field_name}.serialize({attr!r}, obj)',
+                '    if value is not missing:',
+                f'        ret[{key!r}] = value',
+            ]
+            continue
+        lines += [
+            f'    value = getattr(obj, {attr!r}, missing)',
+            '    if value is not missing:',
+            f'        ret[{key!r}] = None if value is None else '
+            + inline.format(field=field_name, attr=attr),
+        ]
+
+    for i, hook_name in enumerate(hooks[(POST_DUMP, False)]):
+        hook = getattr(schema, hook_name)
+        hook_args = '(ret, obj, many=False)' \
+            if hook.__marshmallow_hook__[(POST_DUMP, False)].get(
+                'pass_original',
+            ) else '(ret, many=False)'
+        namespace[f'hook_{i}'] = hook
+        lines.append(f'    ret = hook_{i}{hook_args}')
+    lines.append('    return ret')
+
+    exec('\n'.join(lines), namespace)
+    serializer = namespace['serializer']
+    serializer_cache[schema] = serializer
+    return serializer
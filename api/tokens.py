@@ -30,13 +30,13 @@ def token_response(token):
         if current_app.config['USE_CORS']:  # pragma: no branch
             samesite = 'none' if not current_app.debug else 'lax'
         headers['Set-Cookie'] = dump_cookie(
-            'refresh_token', token.refresh_token,
+            'refresh_token', token.issued_refresh_token,
             path=url_for('tokens.new'), secure=not current_app.debug,
             httponly=True, samesite=samesite,
         )
     return {
-        'access_token': token.access_token,
-        'refresh_token': token.refresh_token
+        'access_token': token.issued_access_token,
+        'refresh_token': token.issued_refresh_token
         if current_app.config['REFRESH_TOKEN_IN_BODY'] else None,
     }, 200, headers
 
@@ -56,7 +56,8 @@ def new():
     user = basic_auth.current_user()
     token = user.generate_auth_token()
     db.session.add(token)
-    Token.clean()  # keep token table clean of old tokens
+    if current_app.config['TOKEN_CLEAN_INLINE']:
+        Token.clean()  # keep token table clean of old tokens
     db.session.commit()
     return token_response(token)
 
@@ -98,7 +99,7 @@ def revoke():
     access_token = request.headers['Authorization'].split()[1]
     token = db.session.scalar(
         Token.select().filter_by(
-            access_token=access_token,
+            access_token=Token.digest(access_token),
         ),
     )
     if not token:  # pragma: no cover
@@ -8,7 +8,9 @@ from flask import jsonify
 
 from api import db
 from api.auth import token_auth
+from api.decorators import conditional_response
 from api.enums import Action
+from api.loading import eager_load_options
 from api.models import ChangeLog
 from api.models import User
 from api.schemas import AccountSchema
@@ -31,21 +33,20 @@ def new(args):
     # Setup
     user = User(**args)
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()  # assigns the id, committed with the change below
 
     # Track changes
-    change = ChangeLog(
-        object_type=type(user).__name__,
-        object_id=user.id,
-        operation=Action.INSERT.value,
-        requester_id=user.id,
-        attribute_name='',
-        old_value='',
-        new_value=f'Add User ID:{user.id}',
-    )
+    ChangeLog.write([{
+        'object_type': type(user).__name__,
+        'object_id': user.id,
+        'operation': Action.INSERT.value,
+        'requester_id': user.id,
+        'attribute_name': '',
+        'old_value': '',
+        'new_value': f'Add User ID:{user.id}',
+    }])
 
     # Save data
-    db.session.add(change)
     db.session.commit()
     return user
 
@@ -54,9 +55,12 @@ def new(args):
 @authenticate(token_auth)
 @response(user_schema)
 @other_responses({404: 'User not found'})
+@conditional_response(user_schema)
 def get(id):
     """Retrieve a user by id"""
-    return db.session.get(User, id) or abort(404)
+    return db.session.get(
+        User, id, options=eager_load_options(user_schema),
+    ) or abort(404)
 
 
 @users.route('/users/<username>', methods=['GET'])
@@ -116,15 +120,6 @@ def put(data):
     # Issuer
     user = token_auth.current_user()
 
-    # Setup
-    prev = {
-        key: getattr(user, key)
-        for key in dict(data).keys()
-        if key not in ['password', 'old_password']
-    }
-    if 'password' in data and 'old_password' in data:
-        prev['password_hash'] = user.password_hash
-
     # Gatekeeper
     if 'password' in data and (
         'old_password' not in data or
@@ -132,29 +127,9 @@ def put(data):
     ):
         abort(400)
 
-    # Modification
+    # Modification, changes are tracked by `api.audit`
     user.update(data)
 
-    # Track changes
-    for key in prev.keys():
-        # if key == 'password_hash' and 'password' not in data:
-        #     continue
-        if getattr(user, key) == prev[key]:
-            # No need to log if the change is same as the origional value.
-            continue
-        # if getattr(user, key) is not None:
-        change = ChangeLog(
-            object_type=type(user).__name__,
-            object_id=user.id,
-            operation=Action.UPDATE.value,
-            requester_id=user.id,
-            attribute_name=key,
-            old_value=prev[key],
-            new_value=getattr(user, key),
-        )
-        db.session.add(change)
-        # db.session.commit()
-
     # Save data
     db.session.commit()
     return user
@@ -27,6 +27,10 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'top-secret!')
     DISABLE_AUTH = as_bool(os.environ.get('DISABLE_AUTH'))
     ACCESS_TOKEN_MINUTES = int(os.environ.get('ACCESS_TOKEN_MINUTES') or '15')
+    ACCESS_TOKEN_SIGNED = as_bool(os.environ.get('ACCESS_TOKEN_SIGNED'))
+    REVOCATION_SYNC_SECONDS = int(
+        os.environ.get('REVOCATION_SYNC_SECONDS') or '5',
+    )
     REFRESH_TOKEN_DAYS = int(os.environ.get('REFRESH_TOKEN_DAYS') or '7')
     REFRESH_TOKEN_IN_COOKIE = as_bool(
         os.environ.get(
@@ -36,9 +40,55 @@ class Config:
     REFRESH_TOKEN_IN_BODY = as_bool(
         os.environ.get('REFRESH_TOKEN_IN_BODY') or 'yes',
     )
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE') or '1024')
+    TOKEN_CACHE_SECONDS = int(os.environ.get('TOKEN_CACHE_SECONDS') or '60')
+    LAST_SEEN_RESOLUTION_SECONDS = int(
+        os.environ.get('LAST_SEEN_RESOLUTION_SECONDS') or '60',
+    )
+    LAST_SEEN_FLUSH_SECONDS = int(
+        os.environ.get('LAST_SEEN_FLUSH_SECONDS') or '30',
+    )
+    TOKEN_CLEAN_INLINE = as_bool(
+        os.environ.get('TOKEN_CLEAN_INLINE') or 'yes',
+    )
     RESET_TOKEN_MINUTES = int(os.environ.get('RESET_TOKEN_MINUTES') or '15')
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or \
+        'pbkdf2:sha256:260000'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or '2')
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or '16')
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT') or '10')
     PASSWORD_RESET_URL = os.environ.get('PASSWORD_RESET_URL') or \
         'http://localhost:3000/reset'
+    COUNT_CACHE_SIZE = int(os.environ.get('COUNT_CACHE_SIZE') or '1024')
+    COUNT_CACHE_SECONDS = int(os.environ.get('COUNT_CACHE_SECONDS') or '30')
+    ETAG_CACHE_SIZE = int(os.environ.get('ETAG_CACHE_SIZE') or '4096')
+    ETAG_CACHE_SECONDS = int(os.environ.get('ETAG_CACHE_SECONDS') or '10')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or '500')
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or '6')
+    COMPRESS_CACHE_SIZE = int(os.environ.get('COMPRESS_CACHE_SIZE') or '256')
+    COMPRESS_CACHE_SECONDS = int(
+        os.environ.get('COMPRESS_CACHE_SECONDS') or '60',
+    )
+    EXPIRY_INTERVAL_SECONDS = int(
+        os.environ.get('EXPIRY_INTERVAL_SECONDS') or '60',
+    )
+    EXPIRY_LOOKAHEAD_SECONDS = int(
+        os.environ.get('EXPIRY_LOOKAHEAD_SECONDS') or '3600',
+    )
+    EXPIRY_BATCH_SIZE = int(os.environ.get('EXPIRY_BATCH_SIZE') or '500')
+    AUDIT_QUEUE_INTERVAL_MS = int(
+        os.environ.get('AUDIT_QUEUE_INTERVAL_MS') or '0',
+    )
+    AUDIT_QUEUE_BATCH_SIZE = int(
+        os.environ.get('AUDIT_QUEUE_BATCH_SIZE') or '500',
+    )
+    AUDIT_SPOOL_PATH = os.environ.get('AUDIT_SPOOL_PATH') or \
+        os.path.join(basedir, 'audit-spool.jsonl')
+    CHANGE_LOG_RETENTION_DAYS = int(
+        os.environ.get('CHANGE_LOG_RETENTION_DAYS') or '90',
+    )
+    CHANGE_LOG_ARCHIVE_DIR = os.environ.get('CHANGE_LOG_ARCHIVE_DIR') or \
+        os.path.join(basedir, 'archive')
     USE_CORS = as_bool(os.environ.get('USE_CORS') or 'yes')
     CORS_SUPPORTS_CREDENTIALS = True
 
@@ -0,0 +1,94 @@
+"""token digests
+
+Revision ID: 4c4538a2d908
+Revises: 465da14cda86
+Create Date: 2026-10-17 22:12:41.794358
+
+"""
+from hashlib import sha256
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c4538a2d908'
+down_revision = '465da14cda86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # revocations were recorded by jti and cannot be converted, they are
+    # dropped and signed tokens issued before this migration stop working
+    op.execute('DELETE FROM revoked_tokens')
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('access_token', sa.LargeBinary(length=32), nullable=False))
+        batch_op.drop_column('jti')
+
+    with op.batch_alter_table('tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_tokens_refresh_token')
+        batch_op.drop_index('ix_tokens_access_token')
+        batch_op.add_column(sa.Column('access_digest', sa.LargeBinary(length=32), nullable=True))
+        batch_op.add_column(sa.Column('refresh_digest', sa.LargeBinary(length=32), nullable=True))
+
+    # opaque tokens are stored in plain text, replace them with their digests
+    tokens = sa.table(
+        'tokens',
+        sa.column('id', sa.Integer),
+        sa.column('access_token', sa.String),
+        sa.column('refresh_token', sa.String),
+        sa.column('access_digest', sa.LargeBinary),
+        sa.column('refresh_digest', sa.LargeBinary),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(
+        tokens.c.id, tokens.c.access_token, tokens.c.refresh_token)).all()
+    if rows:
+        connection.execute(
+            tokens.update().where(tokens.c.id == sa.bindparam('token_id')),
+            [{
+                'token_id': row.id,
+                'access_digest': sha256(row.access_token.encode('utf-8')).digest(),
+                'refresh_digest': sha256(row.refresh_token.encode('utf-8')).digest(),
+            } for row in rows],
+        )
+
+    with op.batch_alter_table('tokens', schema=None) as batch_op:
+        batch_op.drop_column('access_token')
+        batch_op.drop_column('refresh_token')
+        batch_op.alter_column('access_digest',
+               new_column_name='access_token',
+               existing_type=sa.LargeBinary(length=32),
+               nullable=False)
+        batch_op.alter_column('refresh_digest',
+               new_column_name='refresh_token',
+               existing_type=sa.LargeBinary(length=32),
+               nullable=False)
+
+    with op.batch_alter_table('tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tokens_access_token'), ['access_token'], unique=True)
+        batch_op.create_index('ix_tokens_refresh_token_access_token', ['refresh_token', 'access_token'], unique=False)
+
+
+def downgrade():
+    # digests cannot be turned back into tokens, everybody has to log in again
+    op.execute('DELETE FROM tokens')
+    op.execute('DELETE FROM revoked_tokens')
+    with op.batch_alter_table('tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_tokens_refresh_token_access_token')
+        batch_op.drop_index(batch_op.f('ix_tokens_access_token'))
+        batch_op.alter_column('refresh_token',
+               existing_type=sa.LargeBinary(length=32),
+               type_=sa.VARCHAR(length=64),
+               existing_nullable=False)
+        batch_op.alter_column('access_token',
+               existing_type=sa.LargeBinary(length=32),
+               type_=sa.VARCHAR(length=64),
+               existing_nullable=False)
+        batch_op.create_index('ix_tokens_access_token', ['access_token'], unique=False)
+        batch_op.create_index('ix_tokens_refresh_token', ['refresh_token'], unique=False)
+
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('jti', sa.VARCHAR(length=64), nullable=False))
+        batch_op.drop_column('access_token')
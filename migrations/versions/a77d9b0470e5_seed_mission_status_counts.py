@@ -0,0 +1,45 @@
+"""seed mission status counts
+
+Revision ID: a77d9b0470e5
+Revises: 875714f363e2
+Create Date: 2026-10-18 00:32:11.295205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a77d9b0470e5'
+down_revision = '875714f363e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # add the counters of the statuses that have no row yet, so that
+    # MissionStatusCount.adjust only has to update them
+    statuses = [
+        'published', 'accepted', 'completed', 'paid', 'archived', 'done',
+        'issue', 'expired',
+    ]
+    counts = sa.table(
+        'mission_status_counts', sa.column('status', sa.String),
+        sa.column('count', sa.Integer))
+    mission = sa.table('mission', sa.column('status', sa.String))
+    bind = op.get_bind()
+    seeded = set(bind.execute(sa.select(counts.c.status)).scalars())
+    rows = dict(bind.execute(
+        sa.select(mission.c.status, sa.func.count()).group_by(
+            mission.c.status)).all())
+    missing = [status for status in dict.fromkeys(statuses + list(rows))
+               if status not in seeded]
+    if missing:
+        op.bulk_insert(counts, [
+            {'status': status, 'count': rows.get(status, 0)}
+            for status in missing
+        ])
+
+
+def downgrade():
+    pass
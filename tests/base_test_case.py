@@ -9,6 +9,7 @@ class TestConfig(Config):
     SERVER_NAME = 'localhost:5000'
     TESTING = True
     DISABLE_AUTH = True
+    EXPIRY_INTERVAL_SECONDS = 0
     # ALCHEMICAL_DATABASE_URL = 'sqlite://'
 
 
@@ -17,6 +18,10 @@ class TestConfigWithAuth(TestConfig):
     REFRESH_TOKEN_IN_BODY = True
 
 
+class TestConfigWithSignedTokens(TestConfigWithAuth):
+    ACCESS_TOKEN_SIGNED = True
+
+
 class BaseTestCase(unittest.TestCase):
     config = TestConfig
 
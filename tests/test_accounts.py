@@ -1,6 +1,7 @@
+import sqlalchemy as sa
 from tests.base_test_case import BaseTestCase, TestConfigWithAuth
-from api.app import db
-from api.models import ChangeLog
+from api.app import db, etag_cache
+from api.models import Account, ChangeLog
 from tests.util import check_last_log_entry
 from api.enums import Action
 
@@ -208,6 +209,43 @@ class AccountTest(BaseTestCase):
         assert last_log.old_value == '100'
         assert last_log.new_value == '20000'
 
+    def test_edit_account_conflict(self):
+        headers = {'Authorization': f'Bearer {self.user_access_token}'}
+        rv = self.client.post('/api/accounts', json={
+            'name': 'nextorioan',
+            'lp_point': 100
+        }, headers=headers)
+        assert rv.status_code == 201
+        account_id = rv.json['id']
+        url = f'/api/accounts/{account_id}'
+        rv = self.client.get(url, headers=headers)
+        assert rv.status_code == 200
+        etag = rv.headers['ETag']
+
+        # ETags are forgotten when the change commits, not when it flushes
+        account = db.session.get(Account, account_id)
+        account.lp_point = 200
+        db.session.flush()
+        assert len(etag_cache) == 1
+        db.session.rollback()
+        assert len(etag_cache) == 1
+        rv = self.client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert rv.status_code == 304
+
+        # the account is changed by another process while it is loaded
+        account = db.session.get(Account, account_id)
+        assert account.version == 1
+        with db.get_engine().begin() as connection:
+            connection.execute(sa.update(Account).where(
+                Account.id == account_id,
+            ).values(lp_point=300, version=Account.version + 1))
+        rv = self.client.put(url, json={'lp_point': 400}, headers=headers)
+        assert rv.status_code == 409
+        db.session.rollback()
+
+        # the other change is kept
+        assert db.session.get(Account, account_id).lp_point == 300
+
     def test_edit_account_by_other(self):
         name = 'nextorioan'
         # Add account
@@ -193,3 +193,71 @@ class AdminTest(BaseTestCase):
             requester_id=self.admin_id,
             operation=Action.UPDATE.value
         )
+
+    def test_get_changes(self):
+        headers = {'Authorization': f'Bearer {self.admin_access_token}'}
+        for lp_point in [200, 300, 400]:
+            rv = self.client.put(
+                f'/api/accounts/{self.publihser_account_id}', json={
+                    'name': 'Qxlt4 14', 'lp_point': lp_point,
+                }, headers={
+                    'Authorization': f'Bearer {self.publisher_access_token}'})
+            assert rv.status_code == 200
+
+        # history of an object, newest first, a page at a time
+        url = f'/api/admin/changes/Account/{self.publihser_account_id}'
+        rv = self.client.get(url + '?limit=2', headers=headers)
+        assert rv.status_code == 200
+        assert [(c['operation'], c['old_value'], c['new_value'])
+                for c in rv.json['data']] == [
+            (Action.UPDATE.value, '300', '400'),
+            (Action.UPDATE.value, '200', '300'),
+        ]
+        assert rv.json['pagination']['has_more'] is True
+        assert rv.json['pagination']['total'] is None
+        cursor = rv.json['pagination']['next']
+        rv = self.client.get(
+            url + f'?limit=2&cursor={cursor}', headers=headers)
+        assert rv.status_code == 200
+        assert [(c['operation'], c['old_value'], c['new_value'])
+                for c in rv.json['data']] == [
+            (Action.UPDATE.value, '100', '200'),
+            (Action.INSERT.value, '',
+             f'Add Account ID: {self.publihser_account_id}'),
+        ]
+        assert rv.json['pagination']['has_more'] is False
+        first = rv.json['data'][1]['timestamp']
+
+        rv = self.client.get(
+            '/api/admin/changes/Token/1', headers=headers)
+        assert rv.status_code == 404
+
+        # changes made by a user
+        rv = self.client.get(
+            f'/api/admin/users/{self.publihser_user_id}/changes',
+            headers=headers)
+        assert rv.status_code == 200
+        assert len(rv.json['data']) == 5
+        assert {c['requester_id'] for c in rv.json['data']} == {
+            self.publihser_user_id}
+        rv = self.client.get(
+            f'/api/admin/users/{self.admin_id}/changes', headers=headers)
+        assert rv.status_code == 200
+        assert rv.json['data'] == []
+
+        # changes in a time window
+        rv = self.client.get('/api/admin/changes', headers=headers)
+        assert rv.status_code == 200
+        assert len(rv.json['data']) == 5
+        rv = self.client.get(
+            f'/api/admin/changes?until={first}', headers=headers)
+        assert rv.status_code == 200
+        assert [c['object_type'] for c in rv.json['data']] == ['User']
+        rv = self.client.get(
+            f'/api/admin/changes?since={first}&until={first}',
+            headers=headers)
+        assert rv.status_code == 400
+
+        rv = self.client.get('/api/admin/changes', headers={
+            'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 403
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from api.app import db
+from api.archive import archive_path, read_archive, write_archive
+from api.enums import Action
+from api.models import ChangeLog
+from tests.base_test_case import BaseTestCase
+
+
+class ArchiveTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.app.config['CHANGE_LOG_ARCHIVE_DIR'] = self.directory
+        now = datetime.utcnow()
+        self.days = [now - timedelta(days=n) for n in [100, 100, 95, 1]]
+        ChangeLog.write([
+            {
+                'object_type': 'Account',
+                'object_id': i % 2 + 1,
+                'operation': Action.UPDATE.value,
+                'requester_id': self.admin_id,
+                'attribute_name': 'lp_point',
+                'old_value': i,
+                'new_value': i + 1,
+                'timestamp': timestamp,
+            } for i, timestamp in enumerate(self.days)
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def test_archive(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=[
+            'cmd', 'archive-changes', '--batch-size', '2', '--compact'])
+        assert result.exit_code == 0
+        assert '3 change log entries archived.' in result.output
+        assert 'Database compacted.' in result.output
+
+        # recent entries stay in the database
+        logs = db.session.scalars(ChangeLog.select()).all()
+        assert [log.old_value for log in logs] == ['3']
+
+        # one file per day
+        for day in self.days[:3]:
+            assert os.path.exists(archive_path(self.directory, day.date()))
+        assert not os.path.exists(
+            archive_path(self.directory, self.days[3].date()))
+
+        rows = list(read_archive(self.directory))
+        assert [row['old_value'] for row in rows] == ['0', '1', '2']
+        assert rows[0]['timestamp'] == self.days[0]
+        assert rows[0]['requester_id'] == self.admin_id
+        rows = list(read_archive(self.directory, object_id=1))
+        assert [row['old_value'] for row in rows] == ['0', '2']
+        rows = list(read_archive(
+            self.directory, since=self.days[1] + timedelta(seconds=1)))
+        assert [row['old_value'] for row in rows] == ['2']
+        rows = list(read_archive(self.directory, until=self.days[2]))
+        assert [row['old_value'] for row in rows] == ['0', '1']
+
+        # entries archived twice by an interrupted run are read once
+        write_archive(self.directory, rows[:1])
+        assert len(list(read_archive(self.directory))) == 3
+
+        result = runner.invoke(args=[
+            'cmd', 'read-archive', '--object-type', 'Account',
+            '--object-id', '2'])
+        assert result.exit_code == 0
+        lines = [json.loads(line) for line in result.output.splitlines()]
+        assert [line['old_value'] for line in lines] == ['1']
+
+        # nothing left to archive
+        result = runner.invoke(args=['cmd', 'archive-changes'])
+        assert result.exit_code == 0
+        assert '0 change log entries archived.' in result.output
@@ -0,0 +1,236 @@
+import fcntl
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+import sqlalchemy as sa
+from api.app import audit_queue, db
+from api.audit_queue import AuditQueue
+from api.enums import Action, Role, Status
+from api.models import Account, ChangeLog, Mission, User
+from tests.base_test_case import BaseTestCase, TestConfigWithAuth
+
+
+class AuditTests(BaseTestCase):
+    config = TestConfigWithAuth
+
+    def setUp(self):
+        super().setUp()
+        user = db.session.get(User, self.admin_id)
+        db.session.add(Account(
+            name='nextorian', lp_point=100, owner=user, esi_id=343563816))
+        db.session.commit()
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        self.headers = {'Authorization': f'Bearer {rv.json["access_token"]}'}
+
+    def updates(self):
+        return db.session.scalars(ChangeLog.select().where(
+            ChangeLog.operation == Action.UPDATE.value,
+        ).order_by(ChangeLog.id)).all()
+
+    def test_request_changes(self):
+        inserts = []
+
+        def capture(conn, cursor, statement, parameters, context, many):
+            if statement.startswith('INSERT INTO change_log'):
+                inserts.append(statement)
+
+        sa.event.listen(db.get_engine(), 'before_cursor_execute', capture)
+        try:
+            rv = self.client.put('/api/accounts/1', json={
+                'name': 'nextorian', 'lp_point': 250,
+            }, headers=self.headers)
+        finally:
+            sa.event.remove(
+                db.get_engine(), 'before_cursor_execute', capture)
+        assert rv.status_code == 200
+
+        # only the modified attribute is logged, with a single INSERT
+        assert len(inserts) == 1
+        logs = self.updates()
+        assert len(logs) == 1
+        assert logs[0].object_type == 'Account'
+        assert logs[0].object_id == 1
+        assert logs[0].requester_id == self.admin_id
+        assert logs[0].attribute_name == 'lp_point'
+        assert logs[0].old_value == '100'
+        assert logs[0].new_value == '250'
+
+        # changes to several objects
+        rv = self.client.put('/api/accounts/1/default', headers=self.headers)
+        assert rv.status_code == 204
+        logs = self.updates()[1:]
+        assert [(log.object_type, log.attribute_name, log.old_value,
+                 log.new_value) for log in logs] == [
+            ('User', 'default_account_id', '', '1')]
+
+    def test_model_changes(self):
+        user = db.session.get(User, self.admin_id)
+        account = db.session.get(Account, 1)
+        account.activate()
+        user.role = Role.MISSION_PUBLISHER.value
+        db.session.commit()
+
+        # expired attributes are loaded before they are set, and setting
+        # an attribute to its current value is not logged
+        account.deactivate()
+        user.role = Role.MISSION_PUBLISHER.value
+        db.session.commit()
+
+        logs = sorted(
+            (log.object_type, log.attribute_name, log.old_value,
+             log.new_value, log.requester_id)
+            for log in self.updates())
+        assert logs == sorted([
+            ('Account', 'activated', '0', '1', 0),
+            ('Account', 'activated', '1', '0', 0),
+            ('User', 'role', Role.ADMIN.value, Role.MISSION_PUBLISHER.value,
+             0),
+        ])
+
+
+class AuditQueueTests(BaseTestCase):
+    config = TestConfigWithAuth
+
+    def setUp(self):
+        super().setUp()
+        self.spool_dir = tempfile.mkdtemp()
+        audit_queue.configure(
+            3600000, 10000, os.path.join(self.spool_dir, 'spool.jsonl'))
+        user = db.session.get(User, self.admin_id)
+        db.session.add(Account(
+            name='nextorian', lp_point=100, owner=user, esi_id=343563816))
+        db.session.commit()
+        audit_queue.drain()
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        self.headers = {'Authorization': f'Bearer {rv.json["access_token"]}'}
+
+    def tearDown(self):
+        audit_queue.configure(0, 500, None)
+        shutil.rmtree(self.spool_dir)
+        super().tearDown()
+
+    def logs(self):
+        return db.session.scalars(
+            ChangeLog.select().order_by(ChangeLog.id)).all()
+
+    def test_queue(self):
+        rv = self.client.put('/api/accounts/1', json={
+            'name': 'nextorian', 'lp_point': 250,
+        }, headers=self.headers)
+        assert rv.status_code == 200
+
+        # the entry is queued when the transaction commits
+        assert self.logs() == []
+        assert len(audit_queue) == 1
+
+        # entries of rolled back transactions are dropped
+        db.session.get(Account, 1).lp_point = 300
+        db.session.flush()
+        db.session.rollback()
+        assert len(audit_queue) == 1
+
+        assert audit_queue.flush(ChangeLog.write_queued) == 1
+        assert len(audit_queue) == 0
+        logs = self.logs()
+        assert len(logs) == 1
+        assert logs[0].requester_id == self.admin_id
+        assert logs[0].attribute_name == 'lp_point'
+        assert logs[0].old_value == '100'
+        assert logs[0].new_value == '250'
+
+    def test_command(self):
+        now = datetime.utcnow()
+        mission = Mission(
+            title='mission', galaxy='YP-J33', created=now,
+            expired=now - timedelta(minutes=10), bounty=15000000,
+            publisher=db.session.get(Account, 1))
+        db.session.add(mission)
+        db.session.commit()
+        audit_queue.drain()
+
+        # without a writer thread, as in CLI commands, the rows are written
+        # in the command's transaction
+        with mock.patch.object(
+            AuditQueue, 'running', new_callable=mock.PropertyMock,
+            return_value=False,
+        ):
+            runner = self.app.test_cli_runner()
+            result = runner.invoke(args=['cmd', 'expire-missions'])
+        assert result.exit_code == 0
+        assert '1 missions expired.' in result.output
+        assert len(audit_queue) == 0
+        assert [(log.object_id, log.attribute_name, log.old_value,
+                 log.new_value) for log in self.logs()] == [
+            (mission.id, 'status', Status.PUBLISHED.value,
+             Status.EXPIRED.value),
+        ]
+
+    def test_spool(self):
+        account = db.session.get(Account, 1)
+        account.lp_point = 250
+        db.session.commit()
+        account.activate()
+        db.session.commit()
+        assert len(audit_queue) == 2
+
+        # queued entries are saved when the worker exits
+        audit_queue.close()
+        assert len(audit_queue) == 0
+        assert os.path.exists(audit_queue.spool_path)
+
+        # entries that cannot be written are saved too
+        account.lp_point = 300
+        db.session.commit()
+
+        def fail(rows):
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            audit_queue.flush(fail)
+        assert len(audit_queue) == 0
+
+        assert audit_queue.replay(ChangeLog.write_queued) == 3
+        assert not os.path.exists(audit_queue.spool_path)
+        assert audit_queue.replay(ChangeLog.write_queued) == 0
+        assert [(log.attribute_name, log.old_value, log.new_value)
+                for log in self.logs()] == [
+            ('lp_point', '100', '250'),
+            ('activated', '0', '1'),
+            ('lp_point', '250', '300'),
+        ]
+        assert isinstance(self.logs()[0].timestamp, datetime)
+
+    def test_replay_files(self):
+        account = db.session.get(Account, 1)
+        account.lp_point = 250
+        db.session.commit()
+        audit_queue.close()
+        spool_path = audit_queue.spool_path
+
+        # a file left by a worker that stopped during a replay
+        leftover = f'{spool_path}.1-crashed.replay'
+        os.replace(spool_path, leftover)
+        # a file being replayed by another worker
+        account.lp_point = 300
+        db.session.commit()
+        audit_queue.close()
+        busy = f'{spool_path}.2-busy.replay'
+        os.replace(spool_path, busy)
+        account.lp_point = 350
+        db.session.commit()
+        audit_queue.close()
+
+        with open(busy) as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            assert audit_queue.replay(ChangeLog.write_queued) == 2
+        assert sorted(os.listdir(self.spool_dir)) == [
+            os.path.basename(busy)]
+        assert sorted(log.new_value for log in self.logs()) == ['250', '350']
+
+        assert audit_queue.replay(ChangeLog.write_queued) == 1
+        assert os.listdir(self.spool_dir) == []
+        assert audit_queue.replay(ChangeLog.write_queued) == 0
@@ -1,6 +1,10 @@
 from datetime import datetime, timedelta
 from unittest import mock
-from tests.base_test_case import BaseTestCase, TestConfigWithAuth
+import jwt
+from api.app import db, revoked_tokens, token_cache
+from api.models import RevokedToken, Token
+from tests.base_test_case import BaseTestCase, TestConfigWithAuth, \
+    TestConfigWithSignedTokens
 
 
 class AuthTests(BaseTestCase):
@@ -173,6 +177,42 @@ class AuthTests(BaseTestCase):
             'Authorization': f'Bearer {access_token}'})
         assert rv.status_code == 401
 
+    def test_token_cache(self):
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        access_token = rv.json['access_token']
+        key = Token.digest(access_token)
+        assert token_cache.get(key) is None
+
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 200
+        assert token_cache.get(key)[0] == self.admin_id
+
+        # cached tokens still honour their expiration
+        with mock.patch('api.models.datetime') as dt:
+            dt.utcnow.return_value = datetime.utcnow() + timedelta(days=1)
+            rv = self.client.get('/api/me', headers={
+                'Authorization': f'Bearer {access_token}'})
+            assert rv.status_code == 401
+        assert token_cache.get(key) is None
+
+    def test_token_cache_revoke(self):
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        access_token = rv.json['access_token']
+        key = Token.digest(access_token)
+
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 200
+        assert token_cache.get(key) is not None
+
+        rv = self.client.delete('/api/tokens', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 204
+        assert token_cache.get(key) is None
+
     def test_no_login(self):
         rv = self.client.post('/api/tokens')
         assert rv.status_code == 401
@@ -215,3 +255,107 @@ class AuthTests(BaseTestCase):
 
         rv = self.client.post('/api/tokens', auth=('test', 'bar'))
         assert rv.status_code == 200
+
+
+class SignedTokenAuthTests(BaseTestCase):
+    config = TestConfigWithSignedTokens
+
+    def test_signed_token(self):
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        access_token = rv.json['access_token']
+        data = jwt.decode(access_token, self.app.config['SECRET_KEY'],
+                          algorithms=['HS256'])
+        assert data['sub'] == str(self.admin_id)
+
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 200
+        assert rv.json['username'] == 'test'
+
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token + "x"}'})
+        assert rv.status_code == 401
+
+    def test_signed_token_refresh(self):
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        access_token1 = rv.json['access_token']
+        refresh_token1 = rv.json['refresh_token']
+
+        rv = self.client.put('/api/tokens', json={
+            'access_token': access_token1,
+            'refresh_token': refresh_token1})
+        assert rv.status_code == 200
+        access_token2 = rv.json['access_token']
+
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token1}'})
+        assert rv.status_code == 401
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token2}'})
+        assert rv.status_code == 200
+
+        # reusing a refresh token revokes every token of the user
+        rv = self.client.put('/api/tokens', json={
+            'access_token': access_token1,
+            'refresh_token': refresh_token1})
+        assert rv.status_code == 401
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token2}'})
+        assert rv.status_code == 401
+
+    def test_signed_token_revoke(self):
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        access_token = rv.json['access_token']
+
+        rv = self.client.delete('/api/tokens', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 204
+        assert db.session.scalar(RevokedToken.select()) is not None
+
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 401
+
+        # another worker learns about the revocation from the database
+        revoked_tokens.configure(sync_interval=5)
+        assert len(revoked_tokens) == 0
+        rv = self.client.get('/api/me', headers={
+            'Authorization': f'Bearer {access_token}'})
+        assert rv.status_code == 401
+        assert len(revoked_tokens) == 1
+
+    def test_signed_token_revoke_rollback(self):
+        expiration = datetime.utcnow() + timedelta(minutes=15)
+
+        # a revocation is only mirrored once it is stored
+        RevokedToken.revoke(b'a' * 32, expiration)
+        assert b'a' * 32 not in revoked_tokens
+        db.session.rollback()
+        assert b'a' * 32 not in revoked_tokens
+        assert db.session.scalar(RevokedToken.select()) is None
+
+        RevokedToken.revoke(b'b' * 32, expiration)
+        db.session.commit()
+        assert b'b' * 32 in revoked_tokens
+
+    def test_signed_token_sync_out_of_order(self):
+        expiration = datetime.utcnow() + timedelta(minutes=15)
+        db.session.add(RevokedToken(
+            id=5, access_token=b'a' * 32, revoked=datetime.utcnow(),
+            expiration=expiration))
+        db.session.commit()
+        revoked_tokens.configure(sync_interval=5)
+        RevokedToken.sync()
+        assert b'a' * 32 in revoked_tokens
+
+        # a row with a lower id committed after the sync is not missed
+        db.session.add(RevokedToken(
+            id=2, access_token=b'b' * 32, revoked=datetime.utcnow(),
+            expiration=expiration))
+        db.session.commit()
+        RevokedToken.sync()
+        assert b'b' * 32 in revoked_tokens
+        assert RevokedToken.is_revoked(b'b' * 32)
@@ -0,0 +1,41 @@
+import unittest
+from unittest import mock
+
+from api.cache import TTLCache
+
+
+class TTLCacheTests(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1  # 'b' is now the least recently used
+        cache.set('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+
+    def test_expiration(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        with mock.patch('api.cache.monotonic') as monotonic:
+            monotonic.return_value = 100
+            cache.set('a', 1)
+            cache.set('b', 2, ttl=120)
+            monotonic.return_value = 161
+            assert cache.get('a') is None
+            assert cache.get('b') == 2
+
+    def test_discard_if(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', (1, 'x'))
+        cache.set('b', (2, 'y'))
+        cache.set('c', (1, 'z'))
+        assert cache.discard_if(lambda key, value: value[0] == 1) == 2
+        assert cache.get('a') is None
+        assert cache.get('b') == (2, 'y')
+
+    def test_disabled(self):
+        cache = TTLCache(maxsize=10, ttl=0)
+        cache.set('a', 1)
+        assert cache.get('a') is None
@@ -0,0 +1,64 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+from api.app import compression_cache, db
+from api.models import Account, Mission, User
+from tests.base_test_case import BaseTestCase
+
+
+class CompressionTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        user = db.session.get(User, self.admin_id)
+        account = Account(
+            name='nextorian', lp_point=100, owner=user, esi_id=343563816)
+        for i in range(10):
+            db.session.add(Mission(
+                title=f'mission {i}', galaxy='YP-J33',
+                created=datetime.utcnow(),
+                expired=datetime.utcnow() + timedelta(days=3),
+                bounty=15000000, publisher=account))
+        db.session.commit()
+
+    def test_gzip(self):
+        url = '/api/missions/galaxy/YP-J33'
+        rv = self.client.get(url)
+        assert rv.status_code == 200
+        assert 'Content-Encoding' not in rv.headers
+        assert rv.headers['Vary'] == 'Accept-Encoding'
+        plain = rv.data
+
+        rv = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert rv.status_code == 200
+        assert rv.headers['Content-Encoding'] == 'gzip'
+        assert int(rv.headers['Content-Length']) == len(rv.data) < len(plain)
+        assert gzip.decompress(rv.data) == plain
+        assert json.loads(gzip.decompress(rv.data))['pagination'][
+            'count'] == 10
+
+        # the compressed body is reused for the same ETag
+        assert len(compression_cache) == 1
+        compressed = rv.data
+        rv = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert rv.data == compressed
+        assert len(compression_cache) == 1
+
+        # not modified responses have no body to compress
+        rv = self.client.get(url, headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': rv.headers['ETag']})
+        assert rv.status_code == 304
+        assert 'Content-Encoding' not in rv.headers
+
+    def test_small_response(self):
+        rv = self.client.get(
+            '/api/missions/count', headers={'Accept-Encoding': 'gzip'})
+        assert rv.status_code == 200
+        assert 'Content-Encoding' not in rv.headers
+
+    def test_disabled(self):
+        self.app.config['COMPRESS_LEVEL'] = 0
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33',
+            headers={'Accept-Encoding': 'gzip'})
+        assert rv.status_code == 200
+        assert 'Content-Encoding' not in rv.headers
@@ -1,6 +1,8 @@
 # import pytest
-from api.app import db
-from api.models import Account, User, Mission
+import sqlalchemy as sa
+from api.app import db, expiry_schedule
+from api.enums import Status
+from api.models import Account, ChangeLog, User, Mission, MissionStatusCount
 from tests.base_test_case import BaseTestCase
 from datetime import datetime, timedelta
 
@@ -37,3 +39,86 @@ class MissionModelTests(BaseTestCase):
             assert mission.title == titles[i % 6]
             assert mission.galaxy == galaxies[i % 3]
             # assert mission.created == datetime.utcnow()
+
+    def test_status_counts(self):
+        for i in range(3):
+            db.session.add(Mission(
+                title=f'mission {i}',
+                galaxy='YP-J33',
+                created=datetime.utcnow(),
+                expired=datetime.utcnow() + timedelta(days=30),
+                bounty=15000000,
+                publisher=self.account))
+        db.session.commit()
+
+        # every counter is created with the table, missions added without
+        # `adjust` are not counted
+        assert MissionStatusCount.counts() == {
+            status.value: 0 for status in Status}
+
+        # counters not populated, counted from the missions
+        db.session.execute(sa.delete(MissionStatusCount))
+        assert MissionStatusCount.counts() == {'published': 3}
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['cmd', 'rebuild-mission-counts'])
+        assert 'published: 3' in result.output
+        counts = MissionStatusCount.counts()
+        assert counts['published'] == 3
+        assert counts['done'] == 0
+
+        MissionStatusCount.adjust({'published': -1, 'accepted': 1})
+        db.session.commit()
+        counts = MissionStatusCount.counts()
+        assert counts['published'] == 2
+        assert counts['accepted'] == 1
+
+    def test_expire_due(self):
+        now = datetime.utcnow()
+        missions = [
+            Mission(
+                title=f'mission {i}', galaxy='YP-J33', created=now,
+                expired=now + timedelta(minutes=minutes), bounty=15000000,
+                publisher=self.account)
+            for i, minutes in enumerate([-10, -5, 10, 24 * 60])
+        ]
+        db.session.add_all(missions)
+        db.session.commit()
+        missions[1].status = Status.ACCEPTED.value
+        MissionStatusCount.rebuild()
+        db.session.commit()
+
+        assert Mission.expire_due() == [missions[0].id]
+        assert missions[0].status == Status.EXPIRED.value
+        assert missions[1].status == Status.ACCEPTED.value
+        assert missions[2].status == Status.PUBLISHED.value
+        log = db.session.scalar(
+            ChangeLog.select().order_by(ChangeLog.id.desc()))
+        assert (log.object_id, log.requester_id, log.old_value,
+                log.new_value) == (missions[0].id, 0, 'published', 'expired')
+        counts = MissionStatusCount.counts()
+        assert counts['published'] == 2 and counts['expired'] == 1
+
+        # later expirations are served from the schedule, with no query
+        # unless they fall outside of the loaded period
+        assert len(expiry_schedule) == 1
+        mission = Mission(
+            title='mission 4', galaxy='YP-J33', created=now,
+            expired=now + timedelta(minutes=20), bounty=15000000,
+            publisher=self.account)
+        db.session.add(mission)
+        db.session.commit()
+        expiry_schedule.add(mission.id, mission.expired)
+        later = now + timedelta(minutes=30)
+        assert sorted(Mission.expire_due(later)) == [
+            missions[2].id, mission.id]
+        assert len(expiry_schedule) == 0
+        assert Mission.expire_due(now + timedelta(days=2)) == [
+            missions[3].id]
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['cmd', 'expire-missions'])
+        assert '0 missions expired.' in result.output
+        assert Status.next(Status.EXPIRED.value) == [Status.EXPIRED.value]
+        assert Status.isTerminal(Status.EXPIRED.value)
+        assert Status.next(Status.ISSUE.value) == [Status.ISSUE.value]
@@ -1,8 +1,10 @@
 # from api import mission
 from unittest import mock
 from tests.base_test_case import BaseTestCase, TestConfigWithAuth
-# from api.app import db
-# from api.models import Mission
+import sqlalchemy as sa
+from api.app import db
+from api.decorators import encode_cursor
+from api.models import Account, Mission, User
 from api.enums import Role, Action, Status
 from tests.util import check_last_log_entry
 from datetime import datetime
@@ -188,6 +190,46 @@ class MissionTest(BaseTestCase):
             headers={'Authorization': f'Bearer {self.publisher_access_token}'})
         assert rv.status_code == 201
 
+    def test_publish_mission_duplicate_archived(self):
+        timestamp = (
+            datetime.utcnow()+timedelta(days=3)
+        ).strftime('%Y-%m-%dT%H:%M:%SZ')
+        mission = {
+            'title': 'jump gate',
+            'galaxy': 'YP-J33',
+            'created': '2023-03-20T03:28:00Z',
+            'expired': timestamp,
+            'bounty': 15000000
+        }
+        rv = self.client.post(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission',
+            json=mission,
+            headers={'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 201
+        rv = self.client.post(
+            f'/api/missions/{rv.json["id"]}/{Status.ARCHIVED.value}',
+            headers={'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 204
+
+        # Only published missions count as duplicates
+        rv = self.client.post(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission',
+            json=mission,
+            headers={'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 201
+
+        # A duplicate that gets past the lookup is stopped by the index
+        real = Mission.make_fingerprint('jump gate', 'YP-J33', datetime(
+            2023, 3, 20, 3, 28))
+        with mock.patch('api.models.Mission.make_fingerprint') as fp:
+            fp.side_effect = [bytes(32), real]
+            rv = self.client.post(
+                f'/api/accounts/{self.publihser_account_id}/publish_mission',
+                json=mission, headers={
+                    'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 400
+        assert rv.json['description'] == 'Mission already published'
+
     def test_publish_mission(self):
         timestamp = (
             datetime.utcnow()+timedelta(days=3)
@@ -225,6 +267,272 @@ class MissionTest(BaseTestCase):
             object_type='Mission', object_id=mission_id,
             requester_id=self.publihser_user_id, operation=Action.INSERT)
 
+    def test_listing_query_plans(self):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, many):
+            if 'ORDER BY mission.created' in statement:
+                statements.append((statement, parameters))
+
+        headers = {'Authorization': f'Bearer {self.publisher_access_token}'}
+        sa.event.listen(db.get_engine(), 'before_cursor_execute', capture)
+        try:
+            for url in [
+                '/api/missions/galaxy/YP-J33',
+                '/api/missions/galaxy/YP-J33?after=2023-03-20T03:28:00Z',
+                '/api/missions/galaxy/YP-J33?cursor=' + encode_cursor(
+                    datetime(2023, 3, 20, 3, 28), 1),
+                f'/api/accounts/{self.publihser_account_id}/missions',
+                f'/api/missions/state/{Status.PUBLISHED.value}',
+                '/api/missions/runned',
+            ]:
+                rv = self.client.get(url, headers=headers)
+                assert rv.status_code == 200
+        finally:
+            sa.event.remove(
+                db.get_engine(), 'before_cursor_execute', capture)
+
+        assert len(statements) == 7
+        for statement, parameters in statements:
+            plan = db.session.connection().exec_driver_sql(
+                'EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            details = [row[-1] for row in plan]
+            assert any('USING INDEX ix_mission_' in d for d in details)
+            assert not any('TEMP B-TREE' in d for d in details), details
+
+    def test_cursor_pagination(self):
+        timestamp = (
+            datetime.utcnow()+timedelta(days=3)
+        ).strftime('%Y-%m-%dT%H:%M:%SZ')
+        headers = {'Authorization': f'Bearer {self.publisher_access_token}'}
+        for i in range(12):
+            rv = self.client.post(
+                f'/api/accounts/{self.publihser_account_id}/publish_mission',
+                json={
+                    'title': f'jump gate {i}',
+                    'galaxy': 'YP-J33',
+                    # every mission has the same sort key
+                    'created': '2023-03-20T03:28:00Z',
+                    'expired': timestamp,
+                    'bounty': 15000000
+                }, headers=headers)
+            assert rv.status_code == 201
+
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?limit=5', headers=headers)
+        assert rv.status_code == 200
+        ids = [mission['id'] for mission in rv.json['data']]
+        pages = 1
+        while rv.json['pagination']['next'] is not None:
+            rv = self.client.get(
+                '/api/missions/galaxy/YP-J33?limit=5&cursor='
+                + rv.json['pagination']['next'], headers=headers)
+            assert rv.status_code == 200
+            assert rv.json['pagination']['total'] == 12
+            assert rv.json['pagination']['offset'] is None
+            ids += [mission['id'] for mission in rv.json['data']]
+            pages += 1
+        assert pages == 3
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 12
+
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?cursor=foo', headers=headers)
+        assert rv.status_code == 400
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?offset=2&cursor=' + encode_cursor(
+                datetime(2023, 3, 20, 3, 28), 1), headers=headers)
+        assert rv.status_code == 400
+
+    def test_pagination_total_modes(self):
+        timestamp = (
+            datetime.utcnow()+timedelta(days=3)
+        ).strftime('%Y-%m-%dT%H:%M:%SZ')
+        headers = {'Authorization': f'Bearer {self.publisher_access_token}'}
+
+        def publish(i):
+            rv = self.client.post(
+                f'/api/accounts/{self.publihser_account_id}/publish_mission',
+                json={
+                    'title': f'jump gate {i}',
+                    'galaxy': 'YP-J33',
+                    'created': '2023-03-20T03:28:00Z',
+                    'expired': timestamp,
+                    'bounty': 15000000
+                }, headers=headers)
+            assert rv.status_code == 201
+
+        for i in range(3):
+            publish(i)
+        rv = self.client.get('/api/missions/galaxy/YP-J33', headers=headers)
+        assert rv.json['pagination']['total'] == 3
+        assert rv.json['pagination']['has_more'] is False
+
+        # the galaxy listing reuses its total for a while by default
+        publish(3)
+        rv = self.client.get('/api/missions/galaxy/YP-J33', headers=headers)
+        assert rv.json['pagination']['total'] == 3
+        assert rv.json['pagination']['count'] == 4
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?total_mode=exact', headers=headers)
+        assert rv.json['pagination']['total'] == 4
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?total_mode=estimated',
+            headers=headers)
+        assert rv.json['pagination']['total'] == 4
+
+        # without a planner estimate, the estimated total is a cached count
+        publish(4)
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?total_mode=estimated',
+            headers=headers)
+        assert rv.json['pagination']['total'] == 4
+        assert rv.json['pagination']['count'] == 5
+
+        # offsets past a total that may be stale are checked by has_more
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?offset=4', headers=headers)
+        assert rv.status_code == 200
+        assert rv.json['pagination']['total'] == 3
+        assert rv.json['pagination']['count'] == 1
+        assert rv.json['pagination']['has_more'] is False
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?offset=10', headers=headers)
+        assert rv.status_code == 200
+        assert rv.json['pagination']['count'] == 0
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?offset=10&total_mode=exact',
+            headers=headers)
+        assert rv.status_code == 400
+
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?total_mode=none&limit=3',
+            headers=headers)
+        assert rv.status_code == 200
+        assert rv.json['pagination']['total'] is None
+        assert rv.json['pagination']['count'] == 3
+        assert rv.json['pagination']['has_more'] is True
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?total_mode=none&limit=3&cursor='
+            + rv.json['pagination']['next'], headers=headers)
+        assert rv.json['pagination']['count'] == 2
+        assert rv.json['pagination']['has_more'] is False
+        assert rv.json['pagination']['next'] is None
+
+        rv = self.client.get(
+            '/api/missions/galaxy/YP-J33?total_mode=foo', headers=headers)
+        assert rv.status_code == 400
+
+    def test_listing_query_count(self):
+        headers = {'Authorization': f'Bearer {self.publisher_access_token}'}
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        def count_queries(url):
+            db.session.expunge_all()
+            statements.clear()
+            sa.event.listen(
+                db.get_engine(), 'before_cursor_execute', capture)
+            try:
+                rv = self.client.get(url, headers=headers)
+            finally:
+                sa.event.remove(
+                    db.get_engine(), 'before_cursor_execute', capture)
+            assert rv.status_code == 200
+            return len(statements), rv.json
+
+        def publish(i):
+            # each mission has its own publisher, owner and runner
+            owner = User(
+                username=f'owner{i}', email=f'owner{i}@example.com',
+                password='foo', im_number=f'3{i:04d}')
+            runner = User(
+                username=f'runner{i}', email=f'runner{i}@example.com',
+                password='foo', im_number=f'4{i:04d}')
+            account = Account(
+                name=f'account{i}', owner=owner, esi_id=i, activated=True)
+            db.session.add(Mission(
+                title='jump gate', galaxy='N5Y-4N',
+                created=datetime.utcnow(),
+                expired=datetime.utcnow() + timedelta(days=3),
+                bounty=15000000, publisher=account, runner=runner))
+            db.session.flush()
+            owner.default_account_id = account.id
+            db.session.commit()
+
+        url = '/api/missions/galaxy/N5Y-4N?total_mode=exact'
+        publish(0)
+        queries, rv = count_queries(url)
+        assert rv['data'][0]['publisher']['owner']['default_account'][
+            'name'] == 'account0'
+        for i in range(1, 10):
+            publish(i)
+        assert count_queries(url)[0] == queries
+
+    def test_conditional_get(self):
+        headers = {'Authorization': f'Bearer {self.publisher_access_token}'}
+        rv = self.client.post(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission',
+            json={
+                'title': 'jump gate',
+                'galaxy': 'YP-J33',
+                'created': '2023-03-20T03:28:00Z',
+                'expired': (datetime.utcnow() + timedelta(days=3)).strftime(
+                    '%Y-%m-%dT%H:%M:%SZ'),
+                'bounty': 15000000
+            }, headers=headers)
+        assert rv.status_code == 201
+        url = f'/api/missions/{rv.json["id"]}'
+
+        rv = self.client.get(url, headers=headers)
+        assert rv.status_code == 200
+        etag = rv.headers['ETag']
+        assert etag.startswith('W/"')
+
+        # a remembered ETag is answered without loading the mission
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        sa.event.listen(db.get_engine(), 'before_cursor_execute', capture)
+        try:
+            rv = self.client.get(
+                url, headers={**headers, 'If-None-Match': etag})
+        finally:
+            sa.event.remove(
+                db.get_engine(), 'before_cursor_execute', capture)
+        assert rv.status_code == 304
+        assert rv.data == b''
+        assert rv.headers['ETag'] == etag
+        assert not [s for s in statements if 'FROM mission' in s]
+
+        # changing a nested object changes the ETag
+        account = db.session.get(Account, self.publihser_account_id)
+        account.lp_point = 200
+        db.session.commit()
+        rv = self.client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert rv.status_code == 200
+        assert rv.json['publisher']['lp_point'] == 200
+        assert rv.headers['ETag'] != etag
+        rv = self.client.get(url, headers={
+            **headers, 'If-None-Match': rv.headers['ETag']})
+        assert rv.status_code == 304
+
+        # listings are tagged with a hash of the body
+        url = '/api/missions/galaxy/YP-J33'
+        rv = self.client.get(url, headers=headers)
+        assert rv.status_code == 200
+        etag = rv.headers['ETag']
+        rv = self.client.get(url, headers={**headers, 'If-None-Match': etag})
+        assert rv.status_code == 304
+        assert rv.data == b''
+        rv = self.client.get(url + '?limit=1', headers={
+            **headers, 'If-None-Match': etag})
+        assert rv.status_code == 200
+
     # Test if user can get missions by galaxy
     def test_get_missions_by_galaxy(self):
         # generate 10 missions with random galaxy and title
@@ -874,3 +1182,292 @@ class MissionTest(BaseTestCase):
                 headers={
                     'Authorization': f'Bearer {self.runner_access_token}'})
             assert rv.status_code == 204
+
+    def test_multi_accept_terminal(self):
+        rv = self.client.post(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission',
+            json={
+                'title': self.titles[0],
+                'galaxy': self.galaxies[0],
+                'created': '2023-03-20T03:28:00Z',
+                'expired': (
+                    datetime.utcnow() + timedelta(days=3)
+                ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'bounty': 15000000
+            }, headers={
+                'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 201
+        id = rv.json['id']
+        mission = db.session.get(Mission, id)
+        mission.status = Status.ISSUE.value
+        db.session.commit()
+
+        rv = self.client.post('/api/missions/accept', json={
+            'mission_id_list': [id],
+        }, headers={'Authorization': f'Bearer {self.runner_access_token}'})
+        assert rv.status_code == 200
+        assert rv.json['results'] == [
+            {'id': id, 'accepted': False, 'code': 400,
+             'message': 'Operation not allowed'},
+        ]
+        assert db.session.get(Mission, id).status == Status.ISSUE.value
+
+    def test_multi_accept(self):
+        headers = {'Authorization': f'Bearer {self.runner_access_token}'}
+        ids = []
+        for i, expired in enumerate([3, 3, -1, 3]):
+            rv = self.client.post(
+                f'/api/accounts/{self.publihser_account_id}/publish_mission',
+                json={
+                    'title': self.titles[i],
+                    'galaxy': self.galaxies[0],
+                    'created': '2023-03-20T03:28:00Z',
+                    'expired': (
+                        datetime.utcnow() + timedelta(days=3)
+                    ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'bounty': 15000000
+                }, headers={
+                    'Authorization': f'Bearer {self.publisher_access_token}'})
+            assert rv.status_code == 201
+            ids.append(rv.json['id'])
+            if expired < 0:
+                mission = db.session.get(Mission, rv.json['id'])
+                mission.expired = datetime.utcnow() - timedelta(days=1)
+                db.session.commit()
+        rv = self.client.post(
+            f'/api/missions/{ids[3]}/{Status.ARCHIVED.value}',
+            headers={
+                'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 204
+
+        # publishers cannot accept missions
+        rv = self.client.post('/api/missions/accept', json={
+            'mission_id_list': ids,
+        }, headers={'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 401
+        rv = self.client.post('/api/missions/accept', json={
+            'mission_id_list': [],
+        }, headers=headers)
+        assert rv.status_code == 400
+
+        rv = self.client.post('/api/missions/accept', json={
+            'mission_id_list': [ids[0], ids[1], ids[2], ids[3], 9999, ids[0]],
+        }, headers=headers)
+        assert rv.status_code == 200
+        assert rv.json['results'] == [
+            {'id': ids[0], 'accepted': True},
+            {'id': ids[1], 'accepted': True},
+            {'id': ids[2], 'accepted': False, 'code': 403,
+             'message': 'Mission expired'},
+            {'id': ids[3], 'accepted': False, 'code': 400,
+             'message': 'Operation not allowed'},
+            {'id': 9999, 'accepted': False, 'code': 404,
+             'message': 'Mission not found'},
+            {'id': ids[0], 'accepted': False, 'code': 400,
+             'message': 'Operation not allowed'},
+        ]
+        for id in ids[:2]:
+            mission = db.session.get(Mission, id)
+            assert mission.status == Status.ACCEPTED.value
+            assert mission.runner_id == self.runner_id
+        assert db.session.get(Mission, ids[2]).runner_id is None
+        check_last_log_entry(
+            n=2, old={'status': Status.PUBLISHED.value, 'runner': ''},
+            new={'status': Status.ACCEPTED.value, 'runner': self.runner_id},
+            object_type='Mission', object_id=ids[1],
+            requester_id=self.runner_id, operation=Action.UPDATE)
+
+        rv = self.client.get('/api/missions/count')
+        assert rv.json['num_missions_published'] == 1
+        assert rv.json['num_missions_accepted'] == 2
+        assert rv.json['num_missions_archived'] == 1
+
+    def test_bulk_publish(self):
+        headers = {'Authorization': f'Bearer {self.publisher_access_token}'}
+        url = f'/api/accounts/{self.publihser_account_id}/publish_missions'
+        expired = (datetime.utcnow() + timedelta(days=3)).strftime(
+            '%Y-%m-%dT%H:%M:%SZ')
+        missions = [{
+            'title': title, 'galaxy': 'YP-J33',
+            'created': '2023-03-20T03:28:00Z', 'expired': expired,
+            'bounty': 15000000,
+        } for title in self.titles[:3]]
+        rv = self.client.post(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission',
+            json=missions[0], headers=headers)
+        assert rv.status_code == 201
+
+        rv = self.client.post(url, json={'missions': missions}, headers={
+            'Authorization': f'Bearer {self.runner_access_token}'})
+        assert rv.status_code == 401
+        rv = self.client.post(url, json={'missions': []}, headers=headers)
+        assert rv.status_code == 400
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, many):
+            if statement.startswith('INSERT'):
+                statements.append(statement)
+
+        sa.event.listen(db.get_engine(), 'before_cursor_execute', capture)
+        try:
+            rv = self.client.post(url, json={'missions': missions + [
+                missions[1],
+                {**missions[2], 'title': 'angel', 'expired': (
+                    datetime.utcnow() - timedelta(days=1)).strftime(
+                        '%Y-%m-%dT%H:%M:%SZ')},
+            ]}, headers=headers)
+        finally:
+            sa.event.remove(
+                db.get_engine(), 'before_cursor_execute', capture)
+        assert rv.status_code == 200
+        results = rv.json['results']
+        duplicate = {'id': None, 'published': False, 'code': 400,
+                     'message': 'Mission already published'}
+        assert results[0] == duplicate
+        assert results[1]['published'] and results[2]['published']
+        assert results[3] == duplicate
+        assert results[4] == {'id': None, 'published': False, 'code': 400,
+                              'message': 'Expired time is invalid'}
+        assert len([s for s in statements if 'INTO mission ' in s]) == 1
+        assert len([s for s in statements if 'INTO change_log' in s]) == 1
+
+        for result, title in zip(results[1:3], self.titles[1:3]):
+            rv = self.client.get(
+                f'/api/missions/{result["id"]}', headers=headers)
+            assert rv.json['title'] == title
+        check_last_log_entry(
+            n=1, old={}, new={},
+            object_type='Mission', object_id=results[2]['id'],
+            requester_id=self.publihser_user_id, operation=Action.INSERT)
+        rv = self.client.get('/api/missions/count')
+        assert rv.json['num_missions_published'] == 3
+
+    def test_next_step_lost_race(self):
+        rv = self.client.post(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission',
+            json={
+                'title': self.titles[0],
+                'galaxy': self.galaxies[0],
+                'created': '2023-03-20T03:28:00Z',
+                'expired': (
+                    datetime.utcnow() + timedelta(days=1)
+                ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'bounty': 15000000
+            },
+            headers={
+                'Authorization': f'Bearer {self.publisher_access_token}'})
+        assert rv.status_code == 201
+        mission_id = rv.json['id']
+
+        def archive_elsewhere(status):
+            # another request changes the mission after it was read
+            with db.get_engine().begin() as conn:
+                conn.execute(sa.update(Mission.__table__).where(
+                    Mission.__table__.c.id == mission_id,
+                ).values(status=Status.ARCHIVED.value))
+            return False
+
+        with mock.patch('api.mission.Status.isTerminal',
+                        side_effect=archive_elsewhere):
+            rv = self.client.post(
+                f'/api/missions/{mission_id}/{Status.ACCEPTED.value}',
+                headers={
+                    'Authorization': f'Bearer {self.runner_access_token}'})
+        assert rv.status_code == 409
+
+        db.session.expire_all()
+        mission = db.session.get(Mission, mission_id)
+        assert mission.status == Status.ARCHIVED.value
+        assert mission.runner_id is None
+        rv = self.client.get('/api/missions/count')
+        assert rv.json['num_missions_accepted'] == 0
+
+    def test_quit_with_identical_mission_published(self):
+        mission = {
+            'title': self.titles[0],
+            'galaxy': self.galaxies[0],
+            'created': '2023-03-20T03:28:00Z',
+            'expired': (
+                datetime.utcnow() + timedelta(days=1)
+            ).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'bounty': 15000000
+        }
+        publisher = {'Authorization': f'Bearer {self.publisher_access_token}'}
+        runner = {'Authorization': f'Bearer {self.runner_access_token}'}
+        url = f'/api/accounts/{self.publihser_account_id}/publish_mission'
+        rv = self.client.post(url, json=mission, headers=publisher)
+        assert rv.status_code == 201
+        first_id = rv.json['id']
+        rv = self.client.post(
+            f'/api/missions/{first_id}/{Status.ACCEPTED.value}',
+            headers=runner)
+        assert rv.status_code == 204
+
+        # an identical mission can be published while the first is accepted
+        rv = self.client.post(url, json=mission, headers=publisher)
+        assert rv.status_code == 201
+        second_id = rv.json['id']
+
+        # but then the runner cannot put the first back on the market
+        rv = self.client.post(
+            f'/api/missions/{first_id}/{Status.PUBLISHED.value}',
+            headers=runner)
+        assert rv.status_code == 409
+        assert rv.json['description'] == \
+            'An identical mission is already published'
+        db.session.expire_all()
+        assert db.session.get(Mission, first_id).status == \
+            Status.ACCEPTED.value
+
+        # unless the other one is no longer published
+        rv = self.client.post(
+            f'/api/missions/{second_id}/{Status.ARCHIVED.value}',
+            headers=publisher)
+        assert rv.status_code == 204
+        rv = self.client.post(
+            f'/api/missions/{first_id}/{Status.PUBLISHED.value}',
+            headers=runner)
+        assert rv.status_code == 204
+
+    def test_create_commits(self):
+        commits = []
+
+        def count_commits(url, json, token=None):
+            headers = {} if token is None else {
+                'Authorization': f'Bearer {token}'}
+            commits.clear()
+            sa.event.listen(db.get_engine(), 'commit', capture)
+            try:
+                rv = self.client.post(url, json=json, headers=headers)
+            finally:
+                sa.event.remove(db.get_engine(), 'commit', capture)
+            assert rv.status_code == 201
+            return len(commits), rv.json['id']
+
+        def capture(conn):
+            commits.append(conn)
+
+        # the new row and its change log entry are committed together
+        n, _ = count_commits('/api/users', {
+            'username': 'another', 'email': 'another@example.com',
+            'im_number': '268204240', 'password': 'another'})
+        assert n == 1
+        n, account_id = count_commits(
+            '/api/accounts', {'name': 'Isakko III', 'lp_point': 100},
+            self.publisher_access_token)
+        assert n == 1
+        check_last_log_entry(
+            n=1, old={}, new={}, object_type='Account', object_id=account_id,
+            requester_id=self.publihser_user_id, operation=Action.INSERT)
+        n, mission_id = count_commits(
+            f'/api/accounts/{self.publihser_account_id}/publish_mission', {
+                'title': 'jump gate', 'galaxy': 'YP-J33',
+                'created': '2023-03-20T03:28:00Z',
+                'expired': (datetime.utcnow() + timedelta(days=3)).strftime(
+                    '%Y-%m-%dT%H:%M:%SZ'),
+                'bounty': 15000000}, self.publisher_access_token)
+        assert n == 1
+        check_last_log_entry(
+            n=1, old={}, new={}, object_type='Mission', object_id=mission_id,
+            requester_id=self.publihser_user_id, operation=Action.INSERT)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from api.app import db
+from api.models import Account, Mission, User
+from api.schemas import AccountSchema, MissionSchema, UserSchema
+from api.serializers import compile_serializer
+from tests.base_test_case import BaseTestCase
+
+
+class SerializerTests(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = db.session.get(User, self.admin_id)
+        self.account = Account(
+            name='nextorian', lp_point=100, owner=self.user, esi_id=343563816)
+        db.session.add(self.account)
+        db.session.flush()
+        self.user.default_account_id = self.account.id
+        runner = User(
+            username='runner', email='Runner@example.com', password='foo',
+            im_number='10001')
+        for i in range(20):
+            db.session.add(Mission(
+                title=f'mission {i}', galaxy='YP-J33',
+                created=datetime.utcnow(),
+                expired=datetime.utcnow() + timedelta(days=3),
+                bounty=15000000, publisher=self.account,
+                runner=runner if i % 2 else None))
+        db.session.commit()
+        self.missions = db.session.scalars(Mission.select()).all()
+
+    def test_same_output(self):
+        for schema, objects in [
+            (MissionSchema(), self.missions),
+            (MissionSchema(many=True), self.missions),
+            (AccountSchema(), [self.account]),
+            (UserSchema(), db.session.scalars(User.select()).all()),
+        ]:
+            serializer = compile_serializer(schema)
+            for obj in objects:
+                assert serializer(obj) == schema.dump(obj, many=False)
+
+    def test_paginated_response(self):
+        rv = self.client.get('/api/missions/galaxy/YP-J33?limit=5')
+        assert rv.status_code == 200
+        with self.app.test_request_context():
+            data = MissionSchema(many=True).dump(self.missions[::-1][:5])
+            assert rv.json['data'] == self.app.json.loads(
+                self.app.json.dumps(data))
+
+    def test_json_provider(self):
+        dumps = self.app.json.dumps
+        assert dumps({'t': datetime(2023, 3, 20, 3, 28)}) == \
+            '{"t":"2023-03-20T03:28:00Z"}'
+        assert dumps([datetime(2023, 3, 20, 3, 28, 0, 1500)]) == \
+            '["2023-03-20T03:28:00.001500Z"]'
+        assert dumps({1: Decimal('1.5')}) == '{"1":"1.5"}'
+        assert self.app.json.loads('{"a":[1,null]}') == {'a': [1, None]}
+        with self.app.test_request_context():
+            rv = self.app.json.response(a=1)
+        assert rv.mimetype == 'application/json'
+        assert rv.json == {'a': 1}
@@ -8,12 +8,14 @@ class TokenModelTests(BaseTestCase):
     def test_token_clean(self):
         user = db.session.scalar(User.select())
         token1 = Token(
-            access_token='a1', refresh_token='r1',
+            access_token=Token.digest('a1'),
+            refresh_token=Token.digest('r1'),
             access_expiration=datetime.utcnow() + timedelta(days=1),
             refresh_expiration=datetime.utcnow() + timedelta(days=1),
             user=user)
         token2 = Token(
-            access_token='a2', refresh_token='r2',
+            access_token=Token.digest('a2'),
+            refresh_token=Token.digest('r2'),
             access_expiration=datetime.utcnow() - timedelta(days=2),
             refresh_expiration=datetime.utcnow() - timedelta(days=2),
             user=user)
@@ -25,4 +27,60 @@ class TokenModelTests(BaseTestCase):
 
         tokens = db.session.scalars(Token.select()).all()
         assert len(tokens) == 1
-        assert tokens[0].access_token == 'a1'
+        assert tokens[0].access_token == Token.digest('a1')
+
+    def test_token_clean_batches(self):
+        user = db.session.scalar(User.select())
+        for i in range(7):
+            db.session.add(Token(
+                access_token=Token.digest(f'a{i}'),
+                refresh_token=Token.digest(f'r{i}'),
+                access_expiration=datetime.utcnow() - timedelta(days=2),
+                refresh_expiration=datetime.utcnow() - timedelta(days=2),
+                user=user))
+        db.session.add(Token(
+            access_token=Token.digest('valid'),
+            refresh_token=Token.digest('valid'),
+            access_expiration=datetime.utcnow() + timedelta(days=1),
+            refresh_expiration=datetime.utcnow() + timedelta(days=1),
+            user=user))
+        db.session.commit()
+
+        assert Token.clean(batch_size=3) == 7
+
+        tokens = db.session.scalars(Token.select()).all()
+        assert len(tokens) == 1
+        assert tokens[0].access_token == Token.digest('valid')
+
+    def test_token_clean_not_inline(self):
+        self.app.config['TOKEN_CLEAN_INLINE'] = False
+        user = db.session.scalar(User.select())
+        db.session.add(Token(
+            access_token=Token.digest('a1'),
+            refresh_token=Token.digest('r1'),
+            access_expiration=datetime.utcnow() - timedelta(days=2),
+            refresh_expiration=datetime.utcnow() - timedelta(days=2),
+            user=user))
+        db.session.commit()
+
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        assert len(db.session.scalars(Token.select()).all()) == 2
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['cmd', 'clean-tokens'])
+        assert '1 expired tokens removed.' in result.output
+        assert len(db.session.scalars(Token.select()).all()) == 1
+
+    def test_token_digest(self):
+        user = db.session.scalar(User.select())
+        token = Token(user=user)
+        token.generate()
+        db.session.add(token)
+        db.session.commit()
+
+        assert len(token.access_token) == 32
+        assert token.access_token == Token.digest(token.issued_access_token)
+        assert token.refresh_token == Token.digest(token.issued_refresh_token)
+        assert User.verify_access_token(token.issued_access_token) == user
+        assert User.verify_access_token(token.issued_refresh_token) is None
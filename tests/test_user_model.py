@@ -1,8 +1,14 @@
-# from datetime import datetime, timedelta
+from datetime import datetime, timedelta
+from threading import Event, Timer
+from time import monotonic, sleep
+from unittest import mock
 # import sqlalchemy as sa
 import pytest
-from api.app import db
-from api.models import User
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash
+from api.app import db, last_seen_buffer, password_hasher
+from api.passwords import PasswordHasher
+from api.models import ChangeLog, User
 from tests.base_test_case import BaseTestCase
 
 
@@ -14,6 +20,49 @@ class UserModelTests(BaseTestCase):
         with pytest.raises(AttributeError):
             u.password
 
+    def test_password_rehash(self):
+        u = db.session.get(User, self.admin_id)
+        u.password_hash = generate_password_hash('foo', 'pbkdf2:sha256:1000')
+        db.session.commit()
+        assert password_hasher.needs_rehash(u.password_hash)
+
+        rv = self.client.post('/api/tokens', auth=('test', 'foo'))
+        assert rv.status_code == 200
+        assert not password_hasher.needs_rehash(u.password_hash)
+        assert u.verify_password('foo')
+
+        # neither hash is recorded in the change log
+        assert not db.session.scalars(ChangeLog.select().where(
+            ChangeLog.attribute_name == 'password_hash')).all()
+
+    def test_password_check_admission(self):
+        hasher = PasswordHasher(workers=1, queue_size=0, timeout=0.1)
+        pwhash = hasher.hash('cat')
+        release = Event()
+        with mock.patch('api.passwords.check_password_hash') as check:
+            check.side_effect = lambda *args: release.wait()
+            with pytest.raises(ServiceUnavailable):
+                hasher.check(pwhash, 'cat')  # times out
+            with pytest.raises(ServiceUnavailable):
+                hasher.check(pwhash, 'cat')  # cannot be admitted
+            release.set()
+        hasher.timeout = 10
+        assert hasher.check(pwhash, 'cat')
+
+    def test_password_check_deadline(self):
+        hasher = PasswordHasher(workers=1, queue_size=0, timeout=1)
+        pwhash = hasher.hash('cat')
+        # the only slot is freed after 0.6s, leaving 0.4s of the timeout
+        # for a check that takes 0.8s
+        hasher._slots.acquire()
+        Timer(0.6, hasher._slots.release).start()
+        with mock.patch('api.passwords.check_password_hash') as check:
+            check.side_effect = lambda *args: sleep(0.8)
+            start = monotonic()
+            with pytest.raises(ServiceUnavailable):
+                hasher.check(pwhash, 'cat')
+            assert monotonic() - start < 1.3
+
     def test_url(self):
         u = User(
             username='john', email='john@example.com',
@@ -27,3 +76,24 @@ class UserModelTests(BaseTestCase):
         assert u.avatar_url == ('https://www.gravatar.com/avatar/'
                                 'd4c74594d841139328695756648b6bd6'
                                 '?d=identicon')
+
+    def test_ping(self):
+        u = db.session.get(User, self.admin_id)
+        last_seen = u.last_seen
+
+        # recent activity is not recorded again
+        u.ping()
+        assert len(last_seen_buffer) == 0
+
+        later = datetime.utcnow() + timedelta(minutes=5)
+        with mock.patch('api.models.datetime') as dt:
+            dt.utcnow.return_value = later
+            u.ping()
+        assert last_seen_buffer.get(u.id) == later
+        assert u.last_seen == last_seen
+        assert u not in db.session.dirty
+
+        User.flush_last_seen()
+        assert len(last_seen_buffer) == 0
+        db.session.expire(u)
+        assert u.last_seen == later
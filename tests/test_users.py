@@ -1,3 +1,5 @@
+from api.app import db
+from api.models import ChangeLog
 from tests.base_test_case import BaseTestCase
 
 
@@ -160,3 +162,9 @@ class UserTests(BaseTestCase):
         assert rv.status_code == 401
         rv = self.client.post('/api/tokens', auth=('test@example.com', 'bar'))
         assert rv.status_code == 200
+
+        # password hashes are not recorded in the change log
+        assert not db.session.scalars(ChangeLog.select().where(
+            (ChangeLog.attribute_name == 'password_hash')
+            | ChangeLog.old_value.like('pbkdf2:%')
+            | ChangeLog.new_value.like('pbkdf2:%'))).all()